@@ -35,7 +35,8 @@ class OperationsCache:
         self,
         account_id: str,
         from_date: datetime,
-        to_date: datetime
+        to_date: datetime,
+        ticker: Optional[str] = None
     ) -> List[OperationCache]:
         """
         Получение операций с умным кэшированием
@@ -49,6 +50,7 @@ class OperationsCache:
             account_id: ID счета
             from_date: Начало периода
             to_date: Конец периода
+            ticker: Тикер инструмента для фильтрации (None - все инструменты)
             
         Returns:
             List[OperationCache]: Список операций
@@ -71,7 +73,8 @@ class OperationsCache:
             cached_ops = await self._get_cached_operations(
                 account_id,
                 from_date,
-                cache_to_date
+                cache_to_date,
+                ticker
             )
             all_operations.extend(cached_ops)
             logger.info(f"Получено из кэша: {len(cached_ops)} операций")
@@ -103,10 +106,12 @@ class OperationsCache:
                         await self._cache_operations(account_id, gap_ops)
                         logger.info(f"Закэшировано пропущенных операций: {len(gap_ops)}")
                         
-                        # Добавить к результату
+                        # Добавить к результату (в кэш попадают все операции,
+                        # в результат - только по запрошенному тикеру)
                         for op_dict in gap_ops:
-                            op = self._dict_to_model(account_id, op_dict)
-                            all_operations.append(op)
+                            if ticker is None or op_dict.get('ticker') == ticker:
+                                op = self._dict_to_model(account_id, op_dict)
+                                all_operations.append(op)
             else:
                 # Кэша нет - запросить весь период до вчера
                 logger.info("Кэш пуст, запрашиваем весь период до вчера...")
@@ -125,8 +130,9 @@ class OperationsCache:
                     # Добавить к результату (если еще не добавлены из кэша)
                     if not cached_ops:
                         for op_dict in hist_ops:
-                            op = self._dict_to_model(account_id, op_dict)
-                            all_operations.append(op)
+                            if ticker is None or op_dict.get('ticker') == ticker:
+                                op = self._dict_to_model(account_id, op_dict)
+                                all_operations.append(op)
         
         # 3. Запросить сегодняшний день (не кэшировать)
         if to_date >= today:
@@ -141,8 +147,9 @@ class OperationsCache:
             
             # Добавить к результату
             for op_dict in today_ops:
-                op = self._dict_to_model(account_id, op_dict)
-                all_operations.append(op)
+                if ticker is None or op_dict.get('ticker') == ticker:
+                    op = self._dict_to_model(account_id, op_dict)
+                    all_operations.append(op)
         
         # Добавляем детальное логирование
         buy_ops = len([op for op in all_operations if 'BUY' in op.type])
@@ -162,7 +169,8 @@ class OperationsCache:
         self,
         account_id: str,
         from_date: datetime,
-        to_date: datetime
+        to_date: datetime,
+        ticker: Optional[str] = None
     ) -> List[OperationCache]:
         """
         Получение операций из кэша
@@ -171,18 +179,24 @@ class OperationsCache:
             account_id: ID счета
             from_date: Начало периода
             to_date: Конец периода
+            ticker: Тикер инструмента для фильтрации (None - все инструменты)
             
         Returns:
             List[OperationCache]: Список операций из кэша
         """
+        conditions = [
+            OperationCache.account_id == account_id,
+            OperationCache.date >= from_date,
+            OperationCache.date <= to_date
+        ]
+        if ticker is not None:
+            # Фильтр по индексированному полю ticker выполняется в SQL
+            conditions.append(OperationCache.ticker == ticker)
+        
         async with self.db.get_session() as session:
             result = await session.execute(
                 select(OperationCache).where(
-                    and_(
-                        OperationCache.account_id == account_id,
-                        OperationCache.date >= from_date,
-                        OperationCache.date <= to_date
-                    )
+                    and_(*conditions)
                 ).order_by(OperationCache.date)
             )
             return result.scalars().all()
@@ -2,18 +2,26 @@
 Telegram Bot для управления системой Auto-Stop
 """
 
-from typing import Optional
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple
 from datetime import datetime
 from telegram import Bot, BotCommand, Update
-from telegram.ext import Application, CommandHandler, ConversationHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
+from telegram.error import TelegramError
+from telegram.ext import (
+    AIORateLimiter, Application, CommandHandler, ContextTypes, ConversationHandler,
+    CallbackQueryHandler, MessageHandler, filters
+)
 
 from src.storage.database import Database
+from src.storage.models import Account
 from src.core.position_manager import PositionManager
 from src.analytics.operations_cache import OperationsCache
 from src.analytics.statistics import StatisticsCalculator
 from src.analytics.reports import ReportFormatter
 from src.config.settings_manager import SettingsManager
 from src.bot.settings_menu import SettingsMenu
+from src.bot.handlers.base import parse_chat_id
 from src.bot.handlers.system import SystemHandler
 from src.bot.handlers.positions import PositionsHandler
 from src.bot.handlers.statistics import StatisticsHandler
@@ -22,12 +30,80 @@ from src.utils.logger import get_logger
 
 logger = get_logger("bot")
 
+# Ограничения исходящих запросов к Telegram Bot API (flood control)
+MAX_MESSAGES_PER_SECOND = 30
+RATE_LIMIT_MAX_RETRIES = 3
+READ_TIMEOUT = 15
+
+# Параметры HTTP-клиента: long polling держит getUpdates открытым до
+# POLL_TIMEOUT секунд, поэтому таймаут чтения для него должен быть больше;
+# пул соединений рассчитан на ответы обработчиков и рассылку уведомлений
+POLL_TIMEOUT = 25
+GET_UPDATES_READ_TIMEOUT = POLL_TIMEOUT + 5
+CONNECTION_POOL_SIZE = 64
+POOL_TIMEOUT = 30
+# Запросы к Bot API (кроме getUpdates) мультиплексируются в одном
+# HTTP/2 соединении с api.telegram.org
+HTTP_VERSION = "2"
+# getUpdates идет через отдельный пул, чтобы long polling никогда не
+# занимал соединения, нужные для ответов и уведомлений
+GET_UPDATES_CONNECTION_POOL_SIZE = 4
+GET_UPDATES_POOL_TIMEOUT = 10
+
+# Пакетная отправка уведомлений: сообщения, поступившие в течение
+# FLUSH_INTERVAL секунд, объединяются в одно (не длиннее лимита Telegram)
+FLUSH_INTERVAL = 1.0
+MAX_MESSAGE_LENGTH = 4096
+# После длинного фрагмента (вероятно, части многосоставного отчета)
+# окно ожидания продлевается, чтобы продолжение попало в тот же пакет
+LONG_MESSAGE_THRESHOLD = 3800
+LONG_FLUSH_INTERVAL = 2.0
+MESSAGE_SEPARATOR = "\n\n"
+# Максимальный размер очереди исходящих сообщений: при переполнении
+# отбрасываются самые старые, а в следующий пакет добавляется пометка
+OUTBOX_MAX_SIZE = 500
+DROPPED_MESSAGES_NOTICE = "⚠️ <i>Пропущено сообщений из-за переполнения очереди: {count}</i>"
+# Максимальное время (в секундах) на отправку накопленных сообщений при
+# остановке: main.py ограничивает всю остановку бота 2 секундами
+STOP_FLUSH_TIMEOUT = 1.0
+
+# Время жизни (в секундах) кэша результатов запросов к БД для команд бота
+DB_CACHE_TTL = 3.0
+
+# Время жизни (в секундах) кэша активного аккаунта: переключение через бота
+# сбрасывает кэш сразу, а TTL подхватывает изменения, сделанные в обход бота
+# (например, обновление last_used_at при перезагрузке API клиента)
+ACTIVE_ACCOUNT_CACHE_TTL = 5.0
+
 
 class TelegramBot:
     """
     Telegram Bot для управления системой
     """
     
+    # Команды бота: (команда, атрибут обработчика, метод обработчика)
+    COMMANDS: ClassVar[Tuple[Tuple[str, str, str], ...]] = (
+        # Системные команды
+        ("start", "system_handler", "cmd_start"),
+        ("stop", "system_handler", "cmd_stop_system"),
+        ("help", "system_handler", "cmd_help"),
+        ("status", "system_handler", "cmd_status"),
+        ("logs", "system_handler", "cmd_logs"),
+        ("set_token", "system_handler", "cmd_set_token"),
+        # Команды для работы с позициями
+        ("positions", "positions_handler", "cmd_positions"),
+        # Команды для работы со статистикой
+        ("stats", "statistics_handler", "cmd_stats"),
+        ("stats_detailed", "statistics_handler", "cmd_stats_detailed"),
+        ("stats_instrument", "statistics_handler", "cmd_stats_instrument"),
+        # Команды управления аккаунтами
+        ("accounts", "accounts_handler", "cmd_accounts"),
+        ("add_account", "accounts_handler", "cmd_add_account"),
+        ("switch_account", "accounts_handler", "cmd_switch_account"),
+        ("current_account", "accounts_handler", "cmd_current_account"),
+        ("remove_account", "accounts_handler", "cmd_remove_account"),
+    )
+    
     def __init__(
         self,
         token: str,
@@ -38,7 +114,11 @@ class TelegramBot:
         api_client: Optional[object] = None,
         operations_cache: Optional[OperationsCache] = None,
         statistics_calculator: Optional[StatisticsCalculator] = None,
-        report_formatter: Optional[ReportFormatter] = None
+        report_formatter: Optional[ReportFormatter] = None,
+        webhook_url: Optional[str] = None,
+        webhook_secret: Optional[str] = None,
+        webhook_listen: str = "0.0.0.0",
+        webhook_port: int = 8443
     ):
         """
         Инициализация бота
@@ -52,9 +132,15 @@ class TelegramBot:
             operations_cache: Кэш операций для статистики
             statistics_calculator: Калькулятор статистики
             report_formatter: Форматтер отчетов
+            webhook_url: Публичный HTTPS адрес для webhook (None - long polling)
+            webhook_secret: Секрет для проверки заголовка X-Telegram-Bot-Api-Secret-Token
+            webhook_listen: Адрес, на котором слушает webhook-сервер
+            webhook_port: Порт webhook-сервера
         """
         self.token = token
         self.chat_id = chat_id
+        # Числовой ID чата для проверки авторизации (преобразуется один раз)
+        self.chat_id_int = parse_chat_id(chat_id)
         self.db = database
         self.position_manager = position_manager
         self.system_control = system_control
@@ -62,18 +148,44 @@ class TelegramBot:
         self.operations_cache = operations_cache
         self.statistics_calculator = statistics_calculator
         self.report_formatter = report_formatter
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.webhook_listen = webhook_listen
+        self.webhook_port = webhook_port
         
         self.application: Optional[Application] = None
         self.bot: Optional[Bot] = None
         self._running = False
         self.start_time = datetime.utcnow()
+        # Монотонное время запуска для расчета uptime (не зависит от перевода часов)
+        self.start_monotonic_ns = time.monotonic_ns()
+        # Время запуска не меняется - форматируем его один раз
+        self.start_time_str = self.start_time.strftime('%d.%m.%Y %H:%M:%S')
+        
+        # Кэш активного аккаунта: значение и время его получения (None - кэш пуст)
+        self._active_account: Optional[Account] = None
+        self._active_account_cached_at: Optional[float] = None
+        self._active_account_lock = asyncio.Lock()
+        
+        # Кэш результатов запросов к БД: ключ -> (время получения, значение)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        
+        # Очередь исходящих сообщений и фоновая задача их отправки
+        self._outbox: asyncio.Queue[str] = asyncio.Queue(maxsize=OUTBOX_MAX_SIZE)
+        self._batch: List[str] = []
+        self._dropped_messages = 0
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._menu_task: Optional[asyncio.Task] = None
         
         # Инициализация меню настроек
-        self.settings_manager = SettingsManager(database)
+        # Глобальные настройки изменяются только через меню бота, поэтому
+        # экземпляр менеджера бота может держать их в кэше
+        self.settings_manager = SettingsManager(database, cache_global_settings=True)
         self.settings_menu = SettingsMenu(
             settings_manager=self.settings_manager,
             database=database,
-            chat_id=chat_id
+            chat_id=chat_id,
+            active_account_getter=self.get_active_account
         )
         
         # Инициализация обработчиков команд
@@ -90,33 +202,42 @@ class TelegramBot:
         
         try:
             # Создание приложения
-            self.application = Application.builder().token(self.token).build()
+            # Обновления обрабатываются последовательно: ConversationHandler
+            # меню настроек хранит состояние диалога, и параллельная обработка
+            # позволила бы следующему обновлению прочитать устаревшее состояние.
+            # Все исходящие запросы проходят через rate limiter: он держит
+            # темп ниже лимитов Telegram и повторяет запрос после RetryAfter
+            self.application = (
+                Application.builder()
+                .token(self.token)
+                .rate_limiter(AIORateLimiter(
+                    overall_max_rate=MAX_MESSAGES_PER_SECOND,
+                    max_retries=RATE_LIMIT_MAX_RETRIES
+                ))
+                .read_timeout(READ_TIMEOUT)
+                .connection_pool_size(CONNECTION_POOL_SIZE)
+                .pool_timeout(POOL_TIMEOUT)
+                .http_version(HTTP_VERSION)
+                .get_updates_read_timeout(GET_UPDATES_READ_TIMEOUT)
+                .get_updates_connection_pool_size(GET_UPDATES_CONNECTION_POOL_SIZE)
+                .get_updates_pool_timeout(GET_UPDATES_POOL_TIMEOUT)
+                .build()
+            )
             self.bot = self.application.bot
             
-            # Регистрация обработчиков команд
-            
-            # Системные команды
-            self.application.add_handler(CommandHandler("start", self.system_handler.cmd_start))
-            self.application.add_handler(CommandHandler("stop", self.system_handler.cmd_stop_system))
-            self.application.add_handler(CommandHandler("help", self.system_handler.cmd_help))
-            self.application.add_handler(CommandHandler("status", self.system_handler.cmd_status))
-            self.application.add_handler(CommandHandler("logs", self.system_handler.cmd_logs))
-            self.application.add_handler(CommandHandler("set_token", self.system_handler.cmd_set_token))
-            
-            # Команды для работы с позициями
-            self.application.add_handler(CommandHandler("positions", self.positions_handler.cmd_positions))
+            # Команды принимаются только из авторизованного чата: обновления
+            # из других чатов отбрасываются диспетчером до вызова обработчика
+            chat_filter = filters.Chat(chat_id=self.chat_id_int)
             
-            # Команды для работы со статистикой
-            self.application.add_handler(CommandHandler("stats", self.statistics_handler.cmd_stats))
-            self.application.add_handler(CommandHandler("stats_detailed", self.statistics_handler.cmd_stats_detailed))
-            self.application.add_handler(CommandHandler("stats_instrument", self.statistics_handler.cmd_stats_instrument))
-            
-            # Команды управления аккаунтами
-            self.application.add_handler(CommandHandler("accounts", self.accounts_handler.cmd_accounts))
-            self.application.add_handler(CommandHandler("add_account", self.accounts_handler.cmd_add_account))
-            self.application.add_handler(CommandHandler("switch_account", self.accounts_handler.cmd_switch_account))
-            self.application.add_handler(CommandHandler("current_account", self.accounts_handler.cmd_current_account))
-            self.application.add_handler(CommandHandler("remove_account", self.accounts_handler.cmd_remove_account))
+            # Регистрация обработчиков команд одним вызовом
+            self.application.add_handlers([
+                CommandHandler(
+                    command,
+                    getattr(getattr(self, handler_name), method_name),
+                    filters=chat_filter
+                )
+                for command, handler_name, method_name in self.COMMANDS
+            ])
             
             # ConversationHandler для меню настроек
             from src.bot.settings_menu import (
@@ -129,7 +250,7 @@ class TelegramBot:
             
             settings_conv = ConversationHandler(
                 entry_points=[
-                    CommandHandler('settings', self.settings_menu.show_main_menu)
+                    CommandHandler('settings', self.settings_menu.show_main_menu, filters=chat_filter)
                 ],
                 states={
                     MAIN_MENU: [
@@ -218,35 +339,39 @@ class TelegramBot:
             
             self.application.add_handler(settings_conv)
             
+            # Единый обработчик исключений, не перехваченных в обработчиках команд
+            self.application.add_error_handler(self._on_error)
+            
             # Запуск бота
             await self.application.initialize()
             await self.application.start()
-            await self.application.updater.start_polling()
+            if self.webhook_url:
+                # Telegram сам доставляет обновления на HTTPS адрес
+                # (TLS терминируется на reverse proxy перед контейнером)
+                await self.application.updater.start_webhook(
+                    listen=self.webhook_listen,
+                    port=self.webhook_port,
+                    url_path=self.token,
+                    webhook_url=f"{self.webhook_url.rstrip('/')}/{self.token}",
+                    secret_token=self.webhook_secret
+                )
+                logger.info("Получение обновлений через webhook, порт {}", self.webhook_port)
+            else:
+                await self.application.updater.start_polling(timeout=POLL_TIMEOUT)
             
-            # Установка команд для меню
-            commands = [
-                BotCommand("start", "🏠 Главное меню"),
-                BotCommand("status", "📊 Статус системы"),
-                BotCommand("positions", "📈 Текущие позиции"),
-                BotCommand("settings", "⚙️ Настройки SL/TP"),
-                BotCommand("stats", "📊 Статистика торговли"),
-                BotCommand("stats_detailed", "📋 Детальная статистика сделок"),
-                BotCommand("stats_instrument", "📈 Статистика по инструменту"),
-                BotCommand("accounts", "👥 Управление счетами"),
-                BotCommand("logs", "📋 Последние логи"),
-                BotCommand("help", "❓ Справка"),
-            ]
-            await self.bot.set_my_commands(commands)
-            logger.info("Команды меню установлены")
+            # Установка команд меню не влияет на обработку обновлений,
+            # поэтому выполняется в фоне и не задерживает запуск
+            self._menu_task = asyncio.create_task(self._set_menu_commands())
             
             self._running = True
+            self._flusher_task = asyncio.create_task(self._flush_outbox())
             logger.info("Telegram Bot запущен")
             
             # Отправка приветственного сообщения
             await self.send_message("🤖 Бот Auto-Stop запущен и готов к работе!")
             
         except Exception as e:
-            logger.error(f"Ошибка при запуске бота: {e}")
+            logger.error("Ошибка при запуске бота: {}", e)
             raise
     
     async def stop(self):
@@ -257,6 +382,31 @@ class TelegramBot:
         try:
             self._running = False
             
+            # Отправка накопленных сообщений до остановки приложения
+            if self._flusher_task:
+                self._flusher_task.cancel()
+                try:
+                    await self._flusher_task
+                except asyncio.CancelledError:
+                    pass
+                self._flusher_task = None
+            try:
+                await asyncio.wait_for(self._flush_batch(), timeout=STOP_FLUSH_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "Не удалось отправить накопленные сообщения за {} сек, осталось: {}",
+                    STOP_FLUSH_TIMEOUT, len(self._batch)
+                )
+            
+            # Установка команд меню не нужна после остановки
+            if self._menu_task and not self._menu_task.done():
+                self._menu_task.cancel()
+                try:
+                    await self._menu_task
+                except asyncio.CancelledError:
+                    pass
+            self._menu_task = None
+            
             if self.application:
                 await self.application.updater.stop()
                 await self.application.stop()
@@ -265,453 +415,210 @@ class TelegramBot:
             logger.info("Telegram Bot остановлен")
             
         except Exception as e:
-            logger.error(f"Ошибка при остановке бота: {e}")
+            logger.error("Ошибка при остановке бота: {}", e)
     
-    async def send_message(self, text: str):
+    async def _on_error(self, update: object, context: ContextTypes.DEFAULT_TYPE):
         """
-        Отправка сообщения в чат
+        Обработка исключений, не перехваченных обработчиками обновлений
         
         Args:
-            text: Текст сообщения
+            update: Обновление, при обработке которого возникла ошибка (может быть None)
+            context: Контекст с информацией об ошибке
         """
-        try:
-            if self.bot:
-                await self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=text,
-                    parse_mode='HTML'
-                )
-        except Exception as e:
-            logger.error(f"Ошибка при отправке сообщения: {e}")
-    
-    async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /start"""
-        await update.message.reply_text(
-            "🤖 <b>Добро пожаловать в Auto-Stop Bot!</b>\n\n"
-            "Я помогу вам управлять системой автоматических стоп-лоссов и тейк-профитов.\n\n"
-            "Доступные команды:\n"
-            "/status - Статус системы\n"
-            "/positions - Текущие позиции\n"
-            "/stats - Статистика\n"
-            "/logs - Последние логи\n"
-            "/help - Справка",
-            parse_mode='HTML'
-        )
-    
-    async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /help"""
-        await update.message.reply_text(
-            "📖 <b>Справка по командам</b>\n\n"
-            "<b>Информация:</b>\n"
-            "/status - Статус системы (uptime, состояние)\n"
-            "/positions - Список открытых позиций\n"
-            "/logs - Последние события\n\n"
-            "<b>Статистика:</b>\n"
-            "/stats [период] [год] - Торговая статистика\n"
-            "  • период: month, week, day (по умолчанию: month)\n"
-            "  • год: 2024, 2025 (по умолчанию: текущий)\n"
-            "  Примеры:\n"
-            "  • /stats - месячная за текущий год\n"
-            "  • /stats week - недельная за текущий год\n"
-            "  • /stats month 2024 - месячная за 2024\n\n"
-            "/stats_detailed - Детальная статистика сделок за сегодня\n"
-            "  • Показывает прибыльные/убыточные сделки\n"
-            "  • Цены входа/выхода\n"
-            "  • Открытые позиции\n\n"
-            "/stats_instrument {ticker} [период] - Статистика по инструменту\n"
-            "  Примеры:\n"
-            "  • /stats_instrument SBER\n"
-            "  • /stats_instrument GAZP week\n\n"
-            "<b>Управление аккаунтами:</b>\n"
-            "/accounts - Список всех счетов\n"
-            "/current_account - Текущий активный счет\n"
-            "/add_account {название} {токен} {account_id} - Добавить счет\n"
-            "/switch_account {название} - Переключить счет (без перезапуска!)\n"
-            "/remove_account {название} - Удалить счет\n\n"
-            "<b>Управление системой:</b>\n"
-            "/stop - Остановить мониторинг\n"
-            "/set_token - Обновить Tinkoff API токен\n\n"
-            "<b>Прочее:</b>\n"
-            "/help - Эта справка\n\n"
-            "💡 <i>Все команды работают только для авторизованного пользователя</i>",
-            parse_mode='HTML'
+        logger.opt(exception=context.error).error(
+            "Необработанная ошибка при обработке обновления: {}", context.error
         )
+        
+        if isinstance(update, Update) and update.effective_message:
+            try:
+                await update.effective_message.reply_text(f"❌ Ошибка: {context.error}")
+            except TelegramError as e:
+                logger.error("Не удалось сообщить об ошибке: {}", e)
     
-    async def cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /status"""
+    async def _set_menu_commands(self):
+        """Установка команд меню бота"""
+        commands = [
+            BotCommand("start", "🏠 Главное меню"),
+            BotCommand("status", "📊 Статус системы"),
+            BotCommand("positions", "📈 Текущие позиции"),
+            BotCommand("settings", "⚙️ Настройки SL/TP"),
+            BotCommand("stats", "📊 Статистика торговли"),
+            BotCommand("stats_detailed", "📋 Детальная статистика сделок"),
+            BotCommand("stats_instrument", "📈 Статистика по инструменту"),
+            BotCommand("accounts", "👥 Управление счетами"),
+            BotCommand("logs", "📋 Последние логи"),
+            BotCommand("help", "❓ Справка"),
+        ]
         try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Расчет uptime
-            uptime = datetime.utcnow() - self.start_time
-            hours = int(uptime.total_seconds() // 3600)
-            minutes = int((uptime.total_seconds() % 3600) // 60)
-            
-            status_text = (
-                "📊 <b>Статус системы</b>\n\n"
-                f"🟢 Статус: <b>Работает</b>\n"
-                f"⏱ Uptime: <b>{hours}ч {minutes}м</b>\n"
-                f"📅 Запущена: <b>{self.start_time.strftime('%d.%m.%Y %H:%M:%S')} UTC</b>\n"
-            )
-            
-            await update.message.reply_text(status_text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_status: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+            await self.bot.set_my_commands(commands)
+            logger.info("Команды меню установлены")
+        except TelegramError as e:
+            logger.error("Ошибка при установке команд меню: {}", e)
     
-    async def cmd_positions(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /positions"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Получение открытых позиций
-            positions = await self.db.get_open_positions()
-            
-            if not positions:
-                await update.message.reply_text("📭 Нет открытых позиций")
-                return
-            
-            text = "📈 <b>Открытые позиции</b>\n\n"
-            
-            for pos in positions:
-                direction_emoji = "🟢" if pos.direction == "BUY" else "🔴"
-                text += (
-                    f"{direction_emoji} <b>{pos.ticker}</b>\n"
-                    f"  Количество: {pos.quantity}\n"
-                    f"  Средняя цена: {pos.average_price:.2f}\n"
-                    f"  Тип: {pos.instrument_type}\n\n"
-                )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_positions: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+    async def get_active_account(self) -> Optional[Account]:
+        """
+        Получение активного аккаунта с кэшированием на ACTIVE_ACCOUNT_CACHE_TTL секунд
+        
+        Returns:
+            Optional[Account]: Активный аккаунт или None
+        """
+        if not self._is_active_account_cached():
+            async with self._active_account_lock:
+                if not self._is_active_account_cached():
+                    self._active_account = await self.db.get_active_account()
+                    self._active_account_cached_at = time.monotonic()
+        return self._active_account
     
-    async def cmd_logs(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /logs"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Получение последних событий
-            events = await self.db.get_recent_events(limit=10)
-            
-            if not events:
-                await update.message.reply_text("📭 Нет событий в логах")
-                return
-            
-            text = "📋 <b>Последние события</b>\n\n"
-            
-            for event in events:
-                emoji = "ℹ️" if event.event_type == "INFO" else "⚠️" if event.event_type == "STREAM_ERROR" else "❌"
-                text += (
-                    f"{emoji} <code>{event.created_at.strftime('%H:%M:%S')}</code> "
-                    f"{event.event_type}\n"
-                    f"  {event.description[:100]}\n\n"
-                )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_logs: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+    def _is_active_account_cached(self) -> bool:
+        """Проверка актуальности кэша активного аккаунта"""
+        cached_at = self._active_account_cached_at
+        return cached_at is not None and time.monotonic() - cached_at < ACTIVE_ACCOUNT_CACHE_TTL
     
-    async def cmd_set_token(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /set_token"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Удаление сообщения с токеном для безопасности
-            try:
-                await update.message.delete()
-            except:
-                pass
-            
-            # Проверка аргументов
-            if not context.args or len(context.args) == 0:
-                await self.send_message(
-                    "❌ <b>Ошибка</b>\n\n"
-                    "Использование: <code>/set_token НОВЫЙ_ТОКЕН</code>\n\n"
-                    "⚠️ Сообщение с токеном будет автоматически удалено"
-                )
-                return
-            
-            new_token = context.args[0]
-            
-            # Сохраняем токен в базу данных
-            await self.db.set_setting(
-                key="tinkoff_token",
-                value=new_token,
-                description="Tinkoff API токен (обновлен через Telegram бот)"
-            )
-            
-            logger.info("Токен Tinkoff API обновлен через Telegram бот и сохранен в БД")
-            
-            await self.send_message(
-                "✅ <b>Токен сохранен в базу данных!</b>\n\n"
-                "⚠️ <b>Для применения изменений необходимо перезапустить контейнер:</b>\n"
-                "<code>docker compose restart</code>\n\n"
-                "После перезапуска система будет использовать новый токен."
-            )
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_set_token: {e}")
-            await self.send_message(f"❌ Ошибка при обновлении токена: {str(e)}")
+    def invalidate_active_account(self):
+        """Сброс кэша активного аккаунта"""
+        self._active_account = None
+        self._active_account_cached_at = None
     
-    async def cmd_stop_system(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /stop"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            if self.system_control and hasattr(self.system_control, 'stop'):
-                await self.system_control.stop()
-                
-                # Получение количества активных позиций
-                positions = await self.db.get_open_positions()
-                
-                await update.message.reply_text(
-                    "⏸️ <b>Система остановлена</b>\n\n"
-                    f"📊 Активных позиций: <b>{len(positions)}</b>\n"
-                    f"🔴 Мониторинг: <b>выключен</b>\n"
-                    f"🔴 Автоордера: <b>выключены</b>\n\n"
-                    "Используйте <code>/start</code> для возобновления работы",
-                    parse_mode='HTML'
-                )
-                
-                logger.info("Система остановлена через Telegram бот")
-            else:
-                await update.message.reply_text(
-                    "❌ <b>Ошибка</b>\n\n"
-                    "Управление системой недоступно.\n"
-                    "Функция остановки не реализована.",
-                    parse_mode='HTML'
-                )
+    async def cached(self, key: str, factory: Callable[[], Awaitable[Any]], ttl: float = DB_CACHE_TTL) -> Any:
+        """
+        Получение результата запроса с кэшированием на ttl секунд
+        
+        Args:
+            key: Ключ кэша
+            factory: Функция, возвращающая корутину запроса
+            ttl: Время жизни значения в секундах
             
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_stop_system: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+        Returns:
+            Any: Закэшированное или свежее значение
+        """
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry and now - entry[0] < ttl:
+            return entry[1]
+        
+        value = await factory()
+        self._cache[key] = (now, value)
+        return value
     
-    # Команды управления аккаунтами
+    def invalidate_cache(self):
+        """Сброс кэша результатов запросов к БД"""
+        self._cache.clear()
     
-    async def cmd_accounts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /accounts - список всех аккаунтов"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            accounts = await self.db.get_all_accounts()
-            
-            if not accounts:
-                await update.message.reply_text("📭 Нет добавленных аккаунтов")
-                return
-            
-            text = "📊 <b>Счета Tinkoff</b>\n\n"
-            
-            for acc in accounts:
-                status = "🟢" if acc.is_active else "⚪"
-                active_label = " (активный)" if acc.is_active else ""
-                last_used = acc.last_used_at.strftime('%d.%m.%Y %H:%M') if acc.last_used_at else "никогда"
-                
-                text += (
-                    f"{status} <b>{acc.name}</b>{active_label}\n"
-                    f"   🆔 ID: <code>{acc.account_id}</code>\n"
-                    f"   📄 {acc.description or 'без описания'}\n"
-                    f"   🕐 Последнее использование: {last_used}\n\n"
-                )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_accounts: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+    async def send_message(self, text: str):
+        """
+        Отправка сообщения в чат
+        
+        Сообщение ставится в очередь и отправляется фоновой задачей
+        вместе с другими сообщениями, поступившими в течение FLUSH_INTERVAL.
+        Если очередь переполнена, самое старое сообщение отбрасывается.
+        
+        Args:
+            text: Текст сообщения
+        """
+        if self._outbox.full():
+            self._outbox.get_nowait()
+            self._dropped_messages += 1
+            logger.warning("Очередь исходящих сообщений переполнена, старое сообщение отброшено")
+        
+        self._outbox.put_nowait(text)
     
-    async def cmd_add_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /add_account - добавить новый аккаунт"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Удалить сообщение с токеном
-            try:
-                await update.message.delete()
-            except:
-                pass
-            
-            # Валидация аргументов
-            if len(context.args) < 3:
-                await self.send_message(
-                    "❌ <b>Использование:</b>\n"
-                    "<code>/add_account название токен account_id [описание]</code>\n\n"
-                    "<b>Пример:</b>\n"
-                    "<code>/add_account main t.xxx... 2000012345 Основной счет</code>\n\n"
-                    "⚠️ Сообщение с токеном будет автоматически удалено"
-                )
-                return
-            
-            name = context.args[0]
-            token = context.args[1]
-            account_id = context.args[2]
-            description = " ".join(context.args[3:]) if len(context.args) > 3 else None
-            
-            # Добавить аккаунт в БД
-            account = await self.db.add_account(name, token, account_id, description)
-            
-            await self.send_message(
-                f"✅ <b>Аккаунт добавлен!</b>\n\n"
-                f"📝 Название: <b>{name}</b>\n"
-                f"🆔 Account ID: <code>{account_id}</code>\n"
-                f"📄 Описание: {description or 'не указано'}\n\n"
-                f"Используйте <code>/switch_account {name}</code> для переключения"
-            )
-            
-        except ValueError as e:
-            await self.send_message(f"❌ {str(e)}")
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_add_account: {e}")
-            await self.send_message(f"❌ Ошибка: {str(e)}")
+    async def send_message_now(self, text: str):
+        """
+        Отправка сообщения в чат без очереди
+        
+        Используется для ответов на команды пользователя, которые не должны
+        ждать окна пакетной отправки FLUSH_INTERVAL.
+        
+        Args:
+            text: Текст сообщения
+        """
+        await self._send_now(text)
     
-    async def cmd_switch_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /switch_account - переключить активный аккаунт"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            if not context.args:
-                await update.message.reply_text(
-                    "❌ <b>Использование:</b> <code>/switch_account название</code>",
-                    parse_mode='HTML'
-                )
-                return
-            
-            account_name = context.args[0]
-            
-            # Отправить уведомление о начале переключения
-            await update.message.reply_text(
-                f"🔄 Переключаюсь на аккаунт <b>{account_name}</b>...\n"
-                f"⏳ Переподключение к API...",
-                parse_mode='HTML'
-            )
-            
-            # Вызвать горячее переподключение
-            if self.system_control and hasattr(self.system_control, 'reload_api_client'):
-                await self.system_control.reload_api_client(account_name)
+    async def _flush_outbox(self):
+        """Фоновая задача пакетной отправки сообщений из очереди"""
+        while True:
+            try:
+                self._batch.append(await self._outbox.get())
+                await asyncio.sleep(FLUSH_INTERVAL)
                 
-                # Получить информацию о новом активном аккаунте
-                account = await self.db.get_active_account()
+                self._drain_outbox()
+                if len(self._batch[-1]) >= LONG_MESSAGE_THRESHOLD:
+                    await asyncio.sleep(LONG_FLUSH_INTERVAL - FLUSH_INTERVAL)
                 
-                await self.send_message(
-                    f"✅ <b>Переключение завершено!</b>\n\n"
-                    f"🟢 Активный аккаунт: <b>{account.name}</b>\n"
-                    f"🆔 Account ID: <code>{account.account_id}</code>\n"
-                    f"📄 Описание: {account.description or 'не указано'}\n\n"
-                    f"🔄 Система работает без перезапуска!"
+                await self._flush_batch()
+            except Exception:
+                # Задача не должна завершаться из-за одной ошибки: иначе все
+                # последующие уведомления останутся в очереди. Неотправленный
+                # пакет отбрасывается, чтобы ошибка не повторялась бесконечно
+                logger.exception(
+                    "Ошибка при пакетной отправке, пропущено сообщений: {}",
+                    len(self._batch)
                 )
-            else:
-                await update.message.reply_text("❌ Функция переключения недоступна")
-                
-        except ValueError as e:
-            await self.send_message(f"❌ {str(e)}")
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_switch_account: {e}")
-            await self.send_message(f"❌ Ошибка при переключении: {str(e)}")
+                self._batch.clear()
     
-    async def cmd_current_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /current_account - показать текущий активный аккаунт"""
-        try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            account = await self.db.get_active_account()
-            
-            if not account:
-                await update.message.reply_text("❌ Активный аккаунт не найден")
-                return
-            
-            last_used = account.last_used_at.strftime('%d.%m.%Y %H:%M:%S') if account.last_used_at else "никогда"
-            
-            text = (
-                f"🟢 <b>Активный аккаунт</b>\n\n"
-                f"📝 Название: <b>{account.name}</b>\n"
-                f"🆔 Account ID: <code>{account.account_id}</code>\n"
-                f"📄 Описание: {account.description or 'не указано'}\n"
-                f"🕐 Последнее использование: {last_used}\n"
-                f"📅 Создан: {account.created_at.strftime('%d.%m.%Y %H:%M')}"
-            )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
+    def _drain_outbox(self):
+        """Перенос всех сообщений из очереди в текущий пакет"""
+        while not self._outbox.empty():
+            self._batch.append(self._outbox.get_nowait())
+    
+    async def _flush_batch(self):
+        """Отправка накопленных сообщений, объединенных в пакеты"""
+        self._drain_outbox()
+        
+        if self._dropped_messages:
+            self._batch.insert(0, DROPPED_MESSAGES_NOTICE.format(count=self._dropped_messages))
+            self._dropped_messages = 0
+        
+        for text, count in self._pack_messages(self._batch):
+            await self._send_now(text)
+            # Сообщения убираются из пакета только после отправки: если задачу
+            # отменят во время отправки, остаток будет отправлен при остановке
+            del self._batch[:count]
+    
+    @staticmethod
+    def _pack_messages(texts: List[str]) -> List[Tuple[str, int]]:
+        """
+        Объединение сообщений в пакеты не длиннее MAX_MESSAGE_LENGTH
+        
+        Args:
+            texts: Сообщения в порядке поступления
             
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_current_account: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+        Returns:
+            List[Tuple[str, int]]: Тексты для отправки и количество исходных
+            сообщений, объединенных в каждом из них
+        """
+        messages = []
+        parts: List[str] = []
+        size = 0
+        
+        for text in texts:
+            added = len(text) + (len(MESSAGE_SEPARATOR) if parts else 0)
+            if parts and size + added > MAX_MESSAGE_LENGTH:
+                messages.append((MESSAGE_SEPARATOR.join(parts), len(parts)))
+                parts, size = [], 0
+                added = len(text)
+            parts.append(text)
+            size += added
+        
+        if parts:
+            messages.append((MESSAGE_SEPARATOR.join(parts), len(parts)))
+        
+        return messages
     
-    async def cmd_remove_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /remove_account - удалить аккаунт"""
+    async def _send_now(self, text: str):
+        """
+        Немедленная отправка сообщения в чат
+        
+        Args:
+            text: Текст сообщения
+        """
         try:
-            # Проверка авторизации
-            if str(update.effective_chat.id) != self.chat_id:
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            if not context.args:
-                await update.message.reply_text(
-                    "❌ <b>Использование:</b> <code>/remove_account название</code>",
-                    parse_mode='HTML'
-                )
-                return
-            
-            account_name = context.args[0]
-            
-            # Проверить, не активный ли это аккаунт
-            account = await self.db.get_account_by_name(account_name)
-            if not account:
-                await update.message.reply_text(f"❌ Аккаунт '{account_name}' не найден")
-                return
-            
-            if account.is_active:
-                await update.message.reply_text(
-                    f"⚠️ <b>Нельзя удалить активный аккаунт!</b>\n"
-                    f"Сначала переключитесь на другой аккаунт.",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Удалить
-            success = await self.db.remove_account(account_name)
-            
-            if success:
-                await update.message.reply_text(
-                    f"✅ Аккаунт <b>{account_name}</b> удален",
+            if self.bot:
+                await self.bot.send_message(
+                    chat_id=self.chat_id,
+                    text=text,
                     parse_mode='HTML'
                 )
-            else:
-                await update.message.reply_text(f"❌ Не удалось удалить аккаунт")
-                
-        except ValueError as e:
-            await update.message.reply_text(f"❌ {str(e)}")
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_remove_account: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+        except TelegramError as e:
+            # Сетевые ошибки и таймауты PTB также являются TelegramError
+            logger.error("Ошибка при отправке сообщения: {}", e)
@@ -2,83 +2,160 @@
 Обработчики команд для управления аккаунтами
 """
 
+import asyncio
+from datetime import datetime
+from html import escape
+from typing import Optional
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.bot.handlers.base import BaseHandler
+from src.bot.handlers.base import BaseHandler, UserError, safe_handler
 from src.utils.logger import get_logger
 
 logger = get_logger("bot.handlers.accounts")
 
+# Количество аккаунтов на одной странице /accounts
+ACCOUNTS_PAGE_SIZE = 20
+
+# Шаблоны ответов собираются один раз при импорте модуля
+ACCOUNT_ROW_TEMPLATE = (
+    "{status} <b>{name}</b>{active_label}\n"
+    "   🆔 ID: <code>{account_id}</code>\n"
+    "   📄 {description}\n"
+    "   🕐 Последнее использование: {last_used}\n\n"
+)
+
+ADD_ACCOUNT_USAGE_TEXT = (
+    "❌ <b>Использование:</b>\n"
+    "<code>/add_account название токен account_id [описание]</code>\n\n"
+    "<b>Пример:</b>\n"
+    "<code>/add_account main t.xxx... 2000012345 Основной счет</code>\n\n"
+    "⚠️ Сообщение с токеном будет автоматически удалено"
+)
+
+ACCOUNT_ADDED_TEMPLATE = (
+    "✅ <b>Аккаунт добавлен!</b>\n\n"
+    "📝 Название: <b>{name}</b>\n"
+    "🆔 Account ID: <code>{account_id}</code>\n"
+    "📄 Описание: {description}\n\n"
+    "Используйте <code>/switch_account {name}</code> для переключения"
+)
+
+ACCOUNT_SWITCHED_TEMPLATE = (
+    "✅ <b>Переключение завершено!</b>\n\n"
+    "🟢 Активный аккаунт: <b>{name}</b>\n"
+    "🆔 Account ID: <code>{account_id}</code>\n"
+    "📄 Описание: {description}\n\n"
+    "🔄 Система работает без перезапуска!"
+)
+
+CURRENT_ACCOUNT_TEMPLATE = (
+    "🟢 <b>Активный аккаунт</b>\n\n"
+    "📝 Название: <b>{name}</b>\n"
+    "🆔 Account ID: <code>{account_id}</code>\n"
+    "📄 Описание: {description}\n"
+    "🕐 Последнее использование: {last_used}\n"
+    "📅 Создан: {created}"
+)
+
+
+def _format_datetime(value: Optional[datetime], seconds: bool = False) -> str:
+    """
+    Форматирование даты в виде ДД.ММ.ГГГГ ЧЧ:ММ[:СС] без разбора формата strftime
+    
+    Args:
+        value: Дата и время или None
+        seconds: Добавлять ли секунды
+        
+    Returns:
+        str: Отформатированная дата или "никогда"
+    """
+    if value is None:
+        return "никогда"
+    text = (
+        f"{value.day:02d}.{value.month:02d}.{value.year} "
+        f"{value.hour:02d}:{value.minute:02d}"
+    )
+    if seconds:
+        text += f":{value.second:02d}"
+    return text
+
 
 class AccountsHandler(BaseHandler):
     """
     Обработчики команд для управления аккаунтами
     
     Команды:
-    - /accounts - Список всех аккаунтов
+    - /accounts [страница] - Список аккаунтов
     - /add_account - Добавить новый аккаунт
     - /switch_account - Переключить активный аккаунт
     - /current_account - Показать текущий активный аккаунт
     - /remove_account - Удалить аккаунт
     """
     
+    @safe_handler
     async def cmd_accounts(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик команды /accounts - список всех аккаунтов"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            accounts = await self.db.get_all_accounts()
-            
-            if not accounts:
-                await update.message.reply_text("📭 Нет добавленных аккаунтов")
-                return
-            
-            text = "📊 <b>Счета Tinkoff</b>\n\n"
-            
-            for acc in accounts:
-                status = "🟢" if acc.is_active else "⚪"
-                active_label = " (активный)" if acc.is_active else ""
-                last_used = acc.last_used_at.strftime('%d.%m.%Y %H:%M') if acc.last_used_at else "никогда"
-                
-                text += (
-                    f"{status} <b>{acc.name}</b>{active_label}\n"
-                    f"   🆔 ID: <code>{acc.account_id}</code>\n"
-                    f"   📄 {acc.description or 'без описания'}\n"
-                    f"   🕐 Последнее использование: {last_used}\n\n"
+        """Обработчик команды /accounts [страница] - список аккаунтов"""
+        reply = update.message.reply_text
+        
+        # Номер страницы (по умолчанию первая)
+        page = 1
+        if context.args:
+            try:
+                page = int(context.args[0])
+            except ValueError:
+                page = 0
+            if page < 1:
+                await reply(
+                    "❌ <b>Использование:</b> <code>/accounts [страница]</code>",
+                    parse_mode='HTML'
                 )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_accounts: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+                return
+        
+        total = await self.db.count_accounts()
+        
+        if not total:
+            await reply("📭 Нет добавленных аккаунтов")
+            return
+        
+        pages = (total + ACCOUNTS_PAGE_SIZE - 1) // ACCOUNTS_PAGE_SIZE
+        if page > pages:
+            await reply(f"❌ Страница {page} не найдена (всего страниц: {pages})")
+            return
+        
+        parts = ["📊 <b>Счета Tinkoff</b>\n\n"]
+        
+        async for acc in self.db.iter_accounts(
+            limit=ACCOUNTS_PAGE_SIZE,
+            offset=(page - 1) * ACCOUNTS_PAGE_SIZE
+        ):
+            is_active = acc.is_active
+            parts.append(ACCOUNT_ROW_TEMPLATE.format(
+                status="🟢" if is_active else "⚪",
+                name=escape(acc.name),
+                active_label=" (активный)" if is_active else "",
+                account_id=escape(acc.account_id),
+                description=escape(acc.description or 'без описания'),
+                last_used=_format_datetime(acc.last_used_at)
+            ))
+        
+        if pages > 1:
+            parts.append(f"📄 Страница {page} из {pages}")
+            if page < pages:
+                parts.append(f" — следующая: <code>/accounts {page + 1}</code>")
+        
+        await reply("".join(parts), parse_mode='HTML')
     
     async def cmd_add_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /add_account - добавить новый аккаунт"""
         try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Удалить сообщение с токеном
-            try:
-                await update.message.delete()
-            except:
-                pass
-            
             # Валидация аргументов
             if len(context.args) < 3:
-                await self.send_message(
-                    "❌ <b>Использование:</b>\n"
-                    "<code>/add_account название токен account_id [описание]</code>\n\n"
-                    "<b>Пример:</b>\n"
-                    "<code>/add_account main t.xxx... 2000012345 Основной счет</code>\n\n"
-                    "⚠️ Сообщение с токеном будет автоматически удалено"
+                # Сообщение может содержать токен: удаляется одновременно с подсказкой
+                await asyncio.gather(
+                    self._delete_message(update),
+                    self.send_message(ADD_ACCOUNT_USAGE_TEXT)
                 )
                 return
             
@@ -87,31 +164,27 @@ class AccountsHandler(BaseHandler):
             account_id = context.args[2]
             description = " ".join(context.args[3:]) if len(context.args) > 3 else None
             
-            # Добавить аккаунт в БД
-            account = await self.db.add_account(name, token, account_id, description)
-            
-            await self.send_message(
-                f"✅ <b>Аккаунт добавлен!</b>\n\n"
-                f"📝 Название: <b>{name}</b>\n"
-                f"🆔 Account ID: <code>{account_id}</code>\n"
-                f"📄 Описание: {description or 'не указано'}\n\n"
-                f"Используйте <code>/switch_account {name}</code> для переключения"
+            # Удалить сообщение с токеном и добавить аккаунт в БД параллельно
+            await asyncio.gather(
+                self._delete_message(update),
+                self.db.add_account(name, token, account_id, description)
             )
             
+            await self.send_message(ACCOUNT_ADDED_TEMPLATE.format(
+                name=escape(name),
+                account_id=escape(account_id),
+                description=escape(description or 'не указано')
+            ))
+            
         except ValueError as e:
-            await self.send_message(f"❌ {str(e)}")
+            await self.send_message(f"❌ {escape(str(e))}")
         except Exception as e:
-            logger.error(f"Ошибка в cmd_add_account: {e}")
-            await self.send_message(f"❌ Ошибка: {str(e)}")
+            logger.error("Ошибка в cmd_add_account: {}", e)
+            await self.send_message(f"❌ Ошибка: {escape(str(e))}")
     
     async def cmd_switch_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /switch_account - переключить активный аккаунт"""
         try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
             if not context.args:
                 await update.message.reply_text(
                     "❌ <b>Использование:</b> <code>/switch_account название</code>",
@@ -123,109 +196,82 @@ class AccountsHandler(BaseHandler):
             
             # Отправить уведомление о начале переключения
             await update.message.reply_text(
-                f"🔄 Переключаюсь на аккаунт <b>{account_name}</b>...\n"
+                f"🔄 Переключаюсь на аккаунт <b>{escape(account_name)}</b>...\n"
                 f"⏳ Переподключение к API...",
                 parse_mode='HTML'
             )
             
             # Вызвать горячее переподключение
             if self.system_control and hasattr(self.system_control, 'reload_api_client'):
-                await self.system_control.reload_api_client(account_name)
+                try:
+                    await self.system_control.reload_api_client(account_name)
+                finally:
+                    # Активный аккаунт в БД мог измениться даже при ошибке;
+                    # закэшированные позиции относятся к прежнему аккаунту
+                    self.bot.invalidate_active_account()
+                    self.bot.invalidate_cache()
                 
                 # Получить информацию о новом активном аккаунте
-                account = await self.db.get_active_account()
+                account = await self._get_active_account()
                 
-                await self.send_message(
-                    f"✅ <b>Переключение завершено!</b>\n\n"
-                    f"🟢 Активный аккаунт: <b>{account.name}</b>\n"
-                    f"🆔 Account ID: <code>{account.account_id}</code>\n"
-                    f"📄 Описание: {account.description or 'не указано'}\n\n"
-                    f"🔄 Система работает без перезапуска!"
-                )
+                await self.send_message(ACCOUNT_SWITCHED_TEMPLATE.format(
+                    name=escape(account.name),
+                    account_id=escape(account.account_id),
+                    description=escape(account.description or 'не указано')
+                ))
             else:
                 await update.message.reply_text("❌ Функция переключения недоступна")
                 
         except ValueError as e:
-            await self.send_message(f"❌ {str(e)}")
+            await self.send_message(f"❌ {escape(str(e))}")
         except Exception as e:
-            logger.error(f"Ошибка в cmd_switch_account: {e}")
-            await self.send_message(f"❌ Ошибка при переключении: {str(e)}")
+            logger.error("Ошибка в cmd_switch_account: {}", e)
+            await self.send_message(f"❌ Ошибка при переключении: {escape(str(e))}")
     
+    @safe_handler
     async def cmd_current_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /current_account - показать текущий активный аккаунт"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            account = await self.db.get_active_account()
-            
-            if not account:
-                await update.message.reply_text("❌ Активный аккаунт не найден")
-                return
-            
-            last_used = account.last_used_at.strftime('%d.%m.%Y %H:%M:%S') if account.last_used_at else "никогда"
-            
-            text = (
-                f"🟢 <b>Активный аккаунт</b>\n\n"
-                f"📝 Название: <b>{account.name}</b>\n"
-                f"🆔 Account ID: <code>{account.account_id}</code>\n"
-                f"📄 Описание: {account.description or 'не указано'}\n"
-                f"🕐 Последнее использование: {last_used}\n"
-                f"📅 Создан: {account.created_at.strftime('%d.%m.%Y %H:%M')}"
-            )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_current_account: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+        account = await self._get_active_account()
+        
+        if not account:
+            await update.message.reply_text("❌ Активный аккаунт не найден")
+            return
+        
+        text = CURRENT_ACCOUNT_TEMPLATE.format(
+            name=escape(account.name),
+            account_id=escape(account.account_id),
+            description=escape(account.description or 'не указано'),
+            last_used=_format_datetime(account.last_used_at, seconds=True),
+            created=_format_datetime(account.created_at)
+        )
+        
+        await update.message.reply_text(text, parse_mode='HTML')
     
+    @safe_handler
     async def cmd_remove_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /remove_account - удалить аккаунт"""
+        if not context.args:
+            await update.message.reply_text(
+                "❌ <b>Использование:</b> <code>/remove_account название</code>",
+                parse_mode='HTML'
+            )
+            return
+        
+        account_name = context.args[0]
+        
+        # Удалить: БД отказывает в удалении активного аккаунта (ValueError)
+        # и возвращает False, если аккаунта нет
         try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            if not context.args:
-                await update.message.reply_text(
-                    "❌ <b>Использование:</b> <code>/remove_account название</code>",
-                    parse_mode='HTML'
-                )
-                return
-            
-            account_name = context.args[0]
-            
-            # Проверить, не активный ли это аккаунт
-            account = await self.db.get_account_by_name(account_name)
-            if not account:
-                await update.message.reply_text(f"❌ Аккаунт '{account_name}' не найден")
-                return
-            
-            if account.is_active:
-                await update.message.reply_text(
-                    f"⚠️ <b>Нельзя удалить активный аккаунт!</b>\n"
-                    f"Сначала переключитесь на другой аккаунт.",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Удалить
             success = await self.db.remove_account(account_name)
-            
-            if success:
-                await update.message.reply_text(
-                    f"✅ Аккаунт <b>{account_name}</b> удален",
-                    parse_mode='HTML'
-                )
-            else:
-                await update.message.reply_text(f"❌ Не удалось удалить аккаунт")
-                
         except ValueError as e:
-            await update.message.reply_text(f"❌ {str(e)}")
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_remove_account: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+            raise UserError(str(e)) from e
+        
+        if success:
+            # Сбросить кэш активного аккаунта, чтобы не держать устаревший объект
+            self.bot.invalidate_active_account()
+            await update.message.reply_text(
+                f"✅ Аккаунт <b>{escape(account_name)}</b> удален",
+                parse_mode='HTML'
+            )
+        else:
+            await update.message.reply_text(f"❌ Аккаунт '{account_name}' не найден")
@@ -2,12 +2,103 @@
 Базовый класс для обработчиков команд Telegram бота
 """
 
+import asyncio
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
 from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
 
 from src.utils.logger import get_logger
 
 logger = get_logger("bot.handlers")
 
+# Если запрос выполняется дольше PLACEHOLDER_DELAY секунд, пользователю
+# отправляется сообщение-заглушка, которое затем заменяется ответом
+PLACEHOLDER_DELAY = 0.5
+
+
+def parse_chat_id(chat_id) -> Optional[int]:
+    """
+    Преобразование ID чата в число для быстрого сравнения
+    
+    Args:
+        chat_id: ID чата из конфигурации
+        
+    Returns:
+        Optional[int]: Числовой ID чата или None, если он некорректен
+    """
+    try:
+        return int(chat_id)
+    except (TypeError, ValueError):
+        logger.error("Некорректный ID чата Telegram: {}", chat_id)
+        return None
+
+
+class UserError(Exception):
+    """
+    Ошибка, вызванная действием пользователя
+    
+    Текст исключения - готовое сообщение для пользователя: @safe_handler
+    отправляет его как есть и не логирует как сбой.
+    """
+
+
+def safe_handler(handler):
+    """
+    Декоратор обработки ошибок для обработчиков команд
+    
+    UserError отправляется пользователю как есть. Остальные исключения
+    (включая ValueError из внутренних слоев) логируются и сообщаются
+    пользователю как ошибка.
+    
+    Args:
+        handler: Метод-обработчик команды
+        
+    Returns:
+        Обернутый обработчик
+    """
+    @wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            return await handler(self, update, context)
+        except UserError as e:
+            logger.info("Ошибка пользователя в {}: {}", handler.__name__, e)
+            await update.message.reply_text(f"❌ {str(e)}")
+        except Exception as e:
+            logger.exception("Ошибка в {}: {}", handler.__name__, e)
+            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+    
+    return wrapper
+
+
+def require_analytics(handler):
+    """
+    Декоратор проверки доступности модуля статистики
+    
+    Если компоненты аналитики не инициализированы, пользователю
+    отправляется сообщение об ошибке, а обработчик не вызывается.
+    
+    Args:
+        handler: Метод-обработчик команды
+        
+    Returns:
+        Обернутый обработчик
+    """
+    @wraps(handler)
+    async def wrapper(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not (self.operations_cache and self.statistics_calculator and self.report_formatter):
+            await update.message.reply_text(
+                "❌ <b>Модуль статистики недоступен</b>\n\n"
+                "Компоненты аналитики не инициализированы.",
+                parse_mode='HTML'
+            )
+            return
+        return await handler(self, update, context)
+    
+    return wrapper
+
 
 class BaseHandler:
     """
@@ -25,7 +116,7 @@ class BaseHandler:
         """
         self.bot = bot_instance
         self.db = bot_instance.db
-        self.chat_id = bot_instance.chat_id
+        self.chat_id = bot_instance.chat_id_int
         self.position_manager = bot_instance.position_manager
         self.system_control = bot_instance.system_control
         self.api_client = bot_instance.api_client
@@ -34,23 +125,73 @@ class BaseHandler:
         self.report_formatter = bot_instance.report_formatter
         self.settings_manager = bot_instance.settings_manager
     
-    def _check_auth(self, update: Update) -> bool:
+    async def _delete_message(self, update: Update):
+        """
+        Удаление сообщения пользователя (например, содержащего токен)
+        
+        Ошибки удаления не прерывают обработчик (сообщение могло быть уже
+        удалено) и логируются на уровне DEBUG.
+        
+        Args:
+            update: Объект обновления Telegram
+        """
+        try:
+            await update.message.delete()
+        except TelegramError as e:
+            logger.debug("Не удалось удалить сообщение пользователя: {}", e)
+    
+    async def _await_with_placeholder(
+        self,
+        update: Update,
+        awaitable: Awaitable[Any],
+        placeholder_text: str
+    ) -> Tuple[Any, Callable[..., Awaitable[Any]], bool]:
         """
-        Проверка авторизации пользователя
+        Ожидание результата запроса с заглушкой для медленных запросов
+        
+        Быстрые запросы не порождают лишних сообщений: заглушка отправляется,
+        только если результат не получен за PLACEHOLDER_DELAY секунд.
+        Если заглушку отправить не удалось (или обработчик отменен раньше),
+        запрос отменяется, а исключение пробрасывается дальше.
         
         Args:
             update: Объект обновления Telegram
+            awaitable: Запрос, результат которого нужен для ответа
+            placeholder_text: Текст сообщения-заглушки
             
         Returns:
-            True если пользователь авторизован, иначе False
+            Tuple[Any, Callable, bool]: Результат запроса, функция отправки ответа
+            (reply_text сообщения пользователя или edit_text заглушки) и признак
+            того, что заглушка была отправлена
+        """
+        task = asyncio.ensure_future(awaitable)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=PLACEHOLDER_DELAY)
+            if done:
+                return task.result(), update.message.reply_text, False
+            
+            placeholder = await update.message.reply_text(placeholder_text)
+        except BaseException:
+            # Ответа не будет: запрос не должен продолжать выполняться в фоне
+            task.cancel()
+            raise
+        
+        return await task, placeholder.edit_text, True
+    
+    async def _get_active_account(self):
+        """
+        Получение активного аккаунта из кэша бота
+        
+        Returns:
+            Optional[Account]: Активный аккаунт или None
         """
-        return str(update.effective_chat.id) == self.chat_id
+        return await self.bot.get_active_account()
     
     async def send_message(self, text: str):
         """
-        Отправка сообщения в чат
+        Отправка ответа в чат сразу, минуя очередь уведомлений
         
         Args:
             text: Текст сообщения
         """
-        await self.bot.send_message(text)
+        await self.bot.send_message_now(text)
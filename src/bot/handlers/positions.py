@@ -2,14 +2,61 @@
 Обработчики команд для работы с позициями
 """
 
+from functools import lru_cache
+from html import escape
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.bot.handlers.base import BaseHandler
+from src.bot.handlers.base import BaseHandler, safe_handler
 from src.utils.logger import get_logger
 
 logger = get_logger("bot.handlers.positions")
 
+# Максимальное количество позиций в ответе /positions
+POSITIONS_LIMIT = 30
+
+# Эмодзи направления позиции (для остальных направлений - "🔴")
+DIRECTION_EMOJI = {"BUY": "🟢"}
+
+# Шаблон строки позиции в ответе /positions
+POSITION_TEMPLATE = (
+    "{emoji} <b>{ticker}</b>\n"
+    "  Количество: {quantity}\n"
+    "  Средняя цена: {average_price:.2f}\n"
+    "  Тип: {instrument_type}\n\n"
+)
+
+
+@lru_cache(maxsize=1024)
+def _format_position(
+    ticker: str,
+    direction: str,
+    quantity: int,
+    average_price: float,
+    instrument_type: str
+) -> str:
+    """
+    Форматирование строки позиции (результат кэшируется: позиции меняются редко)
+    
+    Args:
+        ticker: Тикер инструмента
+        direction: Направление позиции
+        quantity: Количество
+        average_price: Средняя цена
+        instrument_type: Тип инструмента
+        
+    Returns:
+        str: HTML-строка позиции
+    """
+    return POSITION_TEMPLATE.format(
+        emoji=DIRECTION_EMOJI.get(direction, "🔴"),
+        ticker=escape(ticker),
+        quantity=quantity,
+        average_price=average_price,
+        instrument_type=instrument_type
+    )
+
 
 class PositionsHandler(BaseHandler):
     """
@@ -19,34 +66,35 @@ class PositionsHandler(BaseHandler):
     - /positions - Список открытых позиций
     """
     
+    @safe_handler
     async def cmd_positions(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /positions"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Получение открытых позиций
-            positions = await self.db.get_open_positions()
-            
-            if not positions:
-                await update.message.reply_text("📭 Нет открытых позиций")
-                return
-            
-            text = "📈 <b>Открытые позиции</b>\n\n"
-            
-            for pos in positions:
-                direction_emoji = "🟢" if pos.direction == "BUY" else "🔴"
-                text += (
-                    f"{direction_emoji} <b>{pos.ticker}</b>\n"
-                    f"  Количество: {pos.quantity}\n"
-                    f"  Средняя цена: {pos.average_price:.2f}\n"
-                    f"  Тип: {pos.instrument_type}\n\n"
-                )
-            
-            await update.message.reply_text(text, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_positions: {e}")
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+        # Получение первых POSITIONS_LIMIT открытых позиций и их общего количества
+        (positions, total), reply, _ = await self._await_with_placeholder(
+            update,
+            self.bot.cached(
+                "open_positions_page",
+                lambda: self.db.get_open_positions_page(limit=POSITIONS_LIMIT)
+            ),
+            "⌛ Загружаю позиции..."
+        )
+        
+        if not total:
+            await reply("📭 Нет открытых позиций")
+            return
+        
+        parts = ["📈 <b>Открытые позиции</b>\n\n"]
+        
+        for pos in positions:
+            parts.append(_format_position(
+                pos.ticker,
+                pos.direction,
+                pos.quantity,
+                pos.average_price,
+                pos.instrument_type
+            ))
+        
+        if total > len(positions):
+            parts.append(f"📄 Показано {len(positions)} из {total}")
+        
+        await reply("".join(parts), parse_mode='HTML')
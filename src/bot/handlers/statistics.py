@@ -2,15 +2,69 @@
 Обработчики команд для работы со статистикой
 """
 
-from datetime import datetime, timezone
+import asyncio
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from html import escape
+from typing import Any, Awaitable, Callable, Iterator, Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from src.bot.handlers.base import BaseHandler
+from src.bot.handlers.base import BaseHandler, require_analytics, safe_handler
 from src.utils.logger import get_logger
 
 logger = get_logger("bot.handlers.statistics")
 
+# Ограничение Telegram на длину одного сообщения
+MAX_MESSAGE_LENGTH = 4096
+
+# Время жизни (в секундах) готового отчета /stats: операции за сегодня всегда
+# запрашиваются из API, поэтому отчет кэшируется лишь на короткое время
+REPORT_CACHE_TTL = 30.0
+
+
+@lru_cache(maxsize=8)
+def _year_start_utc(year: int) -> datetime:
+    """
+    Начало года в UTC (значение зависит только от года и переиспользуется)
+    
+    Args:
+        year: Год
+        
+    Returns:
+        datetime: 1 января указанного года, 00:00 UTC
+    """
+    return datetime(year, 1, 1, tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=2)
+def _day_start_utc(day: date) -> datetime:
+    """
+    Начало суток в UTC (значение зависит только от даты и переиспользуется)
+    
+    Args:
+        day: Дата
+        
+    Returns:
+        datetime: Указанная дата, 00:00 UTC
+    """
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _iter_chunks(text: str, size: int = MAX_MESSAGE_LENGTH) -> Iterator[str]:
+    """
+    Разбиение текста на части без построения промежуточного списка
+    
+    Args:
+        text: Исходный текст
+        size: Максимальная длина части
+        
+    Returns:
+        Iterator[str]: Части текста по порядку
+    """
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
 
 class StatisticsHandler(BaseHandler):
     """
@@ -22,69 +76,90 @@ class StatisticsHandler(BaseHandler):
     - /stats_instrument <ticker> [период] - Статистика по инструменту
     """
     
+    async def _send_report(
+        self,
+        update: Update,
+        reply: Callable[..., Awaitable[Any]],
+        report: str,
+        edits_placeholder: bool = True
+    ):
+        """
+        Отправка отчета, разбитого на части по ограничению Telegram
+        
+        Первая часть отправляется через reply, остальные части отправляются
+        строго по порядку. Если reply заменяет текст сообщения о загрузке,
+        оно уже стоит в чате раньше остальных частей, поэтому редактирование
+        выполняется параллельно с отправкой. Если reply отправляет новое
+        сообщение, первая часть отправляется до остальных.
+        
+        Args:
+            update: Объект обновления Telegram
+            reply: Функция отправки первой части (edit_text или reply_text)
+            report: Текст отчета
+            edits_placeholder: reply редактирует уже отправленное сообщение
+        """
+        chunks = _iter_chunks(report)
+        first = next(chunks, "")
+        
+        async def send_rest():
+            for part in chunks:
+                await update.message.reply_text(part, parse_mode='HTML')
+        
+        if not edits_placeholder:
+            await reply(first, parse_mode='HTML')
+            await send_rest()
+            return
+        
+        await asyncio.gather(
+            reply(first, parse_mode='HTML'),
+            send_rest()
+        )
+    
+    @safe_handler
+    @require_analytics
     async def cmd_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /stats [период] [год]"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Проверка доступности компонентов аналитики
-            if not self.operations_cache or not self.statistics_calculator or not self.report_formatter:
+        # Единый момент времени для всех границ периода
+        now = datetime.now(timezone.utc)
+        
+        # Парсинг аргументов
+        period = "month"  # По умолчанию
+        start_year = now.year  # Текущий год
+        
+        if len(context.args) >= 1:
+            period_arg = context.args[0].lower()
+            if period_arg in ["month", "week", "day"]:
+                period = period_arg
+            else:
                 await update.message.reply_text(
-                    "❌ <b>Модуль статистики недоступен</b>\n\n"
-                    "Компоненты аналитики не инициализированы.",
+                    "❌ <b>Неверный период</b>\n\n"
+                    "Доступные периоды: month, week, day",
                     parse_mode='HTML'
                 )
                 return
-            
-            # Парсинг аргументов
-            period = "month"  # По умолчанию
-            start_year = datetime.now().year  # Текущий год
-            
-            if len(context.args) >= 1:
-                period_arg = context.args[0].lower()
-                if period_arg in ["month", "week", "day"]:
-                    period = period_arg
-                else:
-                    await update.message.reply_text(
-                        "❌ <b>Неверный период</b>\n\n"
-                        "Доступные периоды: month, week, day",
-                        parse_mode='HTML'
-                    )
-                    return
-            
-            if len(context.args) >= 2:
-                try:
-                    start_year = int(context.args[1])
-                    if start_year < 2020 or start_year > 2030:
-                        raise ValueError("Год должен быть в диапазоне 2020-2030")
-                except ValueError as e:
-                    await update.message.reply_text(
-                        f"❌ <b>Неверный год</b>\n\n{str(e)}",
-                        parse_mode='HTML'
-                    )
-                    return
-            
-            # Отправка уведомления о начале обработки
-            processing_msg = await update.message.reply_text(
-                "⏳ Загружаю операции и рассчитываю статистику...",
-                parse_mode='HTML'
-            )
-            
-            # Получение активного аккаунта
-            active_account = await self.db.get_active_account()
-            if not active_account:
-                await processing_msg.edit_text(
-                    "❌ Активный аккаунт не найден",
+        
+        if len(context.args) >= 2:
+            try:
+                start_year = int(context.args[1])
+                if start_year < 2020 or start_year > 2030:
+                    raise ValueError("Год должен быть в диапазоне 2020-2030")
+            except ValueError as e:
+                await update.message.reply_text(
+                    f"❌ <b>Неверный год</b>\n\n{str(e)}",
                     parse_mode='HTML'
                 )
                 return
-            
+        
+        # Получение активного аккаунта (из кэша бота)
+        active_account = await self._get_active_account()
+        if not active_account:
+            await update.message.reply_text("❌ Активный аккаунт не найден")
+            return
+        
+        async def build_report() -> Optional[str]:
             # Определение диапазона дат
-            from_date = datetime(start_year, 1, 1, tzinfo=timezone.utc)
-            to_date = datetime.now(timezone.utc)
+            from_date = _year_start_utc(start_year)
+            to_date = now
             
             # Получение операций с кэшированием
             operations = await self.operations_cache.get_operations(
@@ -92,214 +167,176 @@ class StatisticsHandler(BaseHandler):
                 from_date=from_date,
                 to_date=to_date
             )
-            
             if not operations:
-                await processing_msg.edit_text(
-                    f"📭 <b>Нет операций за {start_year} год</b>",
-                    parse_mode='HTML'
-                )
-                return
+                return None
             
-            # Расчет статистики
+            # Расчет статистики и форматирование отчета
             stats = self.statistics_calculator.calculate_statistics(operations, period=period)
-            
-            # Форматирование отчета
-            report = self.report_formatter.format_report(stats, period=period, start_year=start_year)
-            
-            # Отправка отчета (может быть длинным, разбиваем если нужно)
-            if len(report) > 4096:
-                # Telegram ограничение на длину сообщения
-                parts = [report[i:i+4096] for i in range(0, len(report), 4096)]
-                await processing_msg.delete()
-                for part in parts:
-                    await update.message.reply_text(part, parse_mode='HTML')
-            else:
-                await processing_msg.edit_text(report, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_stats: {e}", exc_info=True)
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+            return self.report_formatter.format_report(stats, period=period, start_year=start_year)
+        
+        # Повторный /stats с теми же параметрами в течение REPORT_CACHE_TTL
+        # секунд получает готовый отчет без загрузки операций и расчетов;
+        # сообщение о загрузке отправляется, только если отчет строится долго
+        report, reply, placeholder_sent = await self._await_with_placeholder(
+            update,
+            self.bot.cached(
+                f"stats_report:{active_account.account_id}:{period}:{start_year}",
+                build_report,
+                ttl=REPORT_CACHE_TTL
+            ),
+            "⏳ Загружаю операции и рассчитываю статистику..."
+        )
+        
+        if not report:
+            await reply(
+                f"📭 <b>Нет операций за {start_year} год</b>",
+                parse_mode='HTML'
+            )
+            return
+        
+        # Отправка отчета (может быть длинным, разбиваем если нужно)
+        await self._send_report(
+            update,
+            reply,
+            report,
+            edits_placeholder=placeholder_sent
+        )
     
+    @safe_handler
+    @require_analytics
     async def cmd_stats_detailed(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /stats_detailed - детальная статистика сделок за сегодня"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Проверка доступности компонентов аналитики
-            if not self.operations_cache or not self.statistics_calculator or not self.report_formatter:
-                await update.message.reply_text(
-                    "❌ <b>Модуль статистики недоступен</b>\n\n"
-                    "Компоненты аналитики не инициализированы.",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Отправка уведомления о начале обработки
-            processing_msg = await update.message.reply_text(
+        # Отправка уведомления и получение активного аккаунта параллельно
+        processing_msg, active_account = await asyncio.gather(
+            update.message.reply_text(
                 "⏳ Загружаю операции и формирую детальный отчет...",
                 parse_mode='HTML'
+            ),
+            self._get_active_account()
+        )
+        if not active_account:
+            await processing_msg.edit_text(
+                "❌ Активный аккаунт не найден",
+                parse_mode='HTML'
             )
-            
-            # Получение активного аккаунта
-            active_account = await self.db.get_active_account()
-            if not active_account:
-                await processing_msg.edit_text(
-                    "❌ Активный аккаунт не найден",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Определение диапазона дат (только сегодня)
-            today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-            from_date = today
-            to_date = datetime.now(timezone.utc)
-            
-            # Получение операций с кэшированием
-            operations = await self.operations_cache.get_operations(
-                account_id=active_account.account_id,
-                from_date=from_date,
-                to_date=to_date
-            )
-            
-            if not operations:
-                await processing_msg.edit_text(
-                    "📭 <b>Нет операций за сегодня</b>",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Расчет статистики
-            stats = self.statistics_calculator.calculate_statistics(operations, period="day")
-            
-            # Форматирование детального отчета с актуальными позициями от брокера
-            report = await self.report_formatter.format_detailed_report(
-                stats, 
-                operations=operations,
-                period="day",
-                start_year=datetime.now().year,
-                api_client=self.api_client,
-                account_id=active_account.account_id
+            return
+        
+        # Определение диапазона дат (только сегодня)
+        now = datetime.now(timezone.utc)
+        from_date = _day_start_utc(now.date())
+        to_date = now
+        
+        # Получение операций с кэшированием
+        operations = await self.operations_cache.get_operations(
+            account_id=active_account.account_id,
+            from_date=from_date,
+            to_date=to_date
+        )
+        
+        if not operations:
+            await processing_msg.edit_text(
+                "📭 <b>Нет операций за сегодня</b>",
+                parse_mode='HTML'
             )
-            
-            # Отправка отчета (может быть длинным, разбиваем если нужно)
-            if len(report) > 4096:
-                # Telegram ограничение на длину сообщения
-                parts = [report[i:i+4096] for i in range(0, len(report), 4096)]
-                await processing_msg.delete()
-                for part in parts:
-                    await update.message.reply_text(part, parse_mode='HTML')
-            else:
-                await processing_msg.edit_text(report, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_stats_detailed: {e}", exc_info=True)
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+            return
+        
+        # Расчет статистики
+        stats = self.statistics_calculator.calculate_statistics(operations, period="day")
+        
+        # Форматирование детального отчета с актуальными позициями от брокера
+        report = await self.report_formatter.format_detailed_report(
+            stats, 
+            operations=operations,
+            period="day",
+            start_year=now.year,
+            api_client=self.api_client,
+            account_id=active_account.account_id
+        )
+        
+        # Отправка отчета (может быть длинным, разбиваем если нужно)
+        await self._send_report(update, processing_msg.edit_text, report)
     
+    @safe_handler
+    @require_analytics
     async def cmd_stats_instrument(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /stats_instrument <ticker> [период]"""
-        try:
-            # Проверка авторизации
-            if not self._check_auth(update):
-                await update.message.reply_text("❌ Доступ запрещен")
-                return
-            
-            # Проверка доступности компонентов аналитики
-            if not self.operations_cache or not self.statistics_calculator or not self.report_formatter:
-                await update.message.reply_text(
-                    "❌ <b>Модуль статистики недоступен</b>\n\n"
-                    "Компоненты аналитики не инициализированы.",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Проверка аргументов
-            if not context.args:
-                await update.message.reply_text(
-                    "❌ <b>Использование:</b>\n"
-                    "<code>/stats_instrument &lt;ticker&gt; [период]</code>\n\n"
-                    "<b>Примеры:</b>\n"
-                    "• /stats_instrument SBER\n"
-                    "• /stats_instrument GAZP week\n"
-                    "• /stats_instrument YNDX month",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Парсинг аргументов
-            ticker = context.args[0].upper()
-            period = "month"  # По умолчанию
-            
-            if len(context.args) >= 2:
-                period_arg = context.args[1].lower()
-                if period_arg in ["month", "week", "day"]:
-                    period = period_arg
-                else:
-                    await update.message.reply_text(
-                        "❌ <b>Неверный период</b>\n\n"
-                        "Доступные периоды: month, week, day",
-                        parse_mode='HTML'
-                    )
-                    return
-            
-            # Отправка уведомления о начале обработки
-            processing_msg = await update.message.reply_text(
-                f"⏳ Загружаю операции по <b>{ticker}</b>...",
+        # Проверка аргументов
+        if not context.args:
+            await update.message.reply_text(
+                "❌ <b>Использование:</b>\n"
+                "<code>/stats_instrument &lt;ticker&gt; [период]</code>\n\n"
+                "<b>Примеры:</b>\n"
+                "• /stats_instrument SBER\n"
+                "• /stats_instrument GAZP week\n"
+                "• /stats_instrument YNDX month",
                 parse_mode='HTML'
             )
-            
-            # Получение активного аккаунта
-            active_account = await self.db.get_active_account()
-            if not active_account:
-                await processing_msg.edit_text(
-                    "❌ Активный аккаунт не найден",
+            return
+        
+        # Парсинг аргументов
+        ticker = context.args[0].upper()
+        # Тикер введен пользователем и выводится в HTML-сообщениях
+        ticker_html = escape(ticker)
+        period = "month"  # По умолчанию
+        
+        if len(context.args) >= 2:
+            period_arg = context.args[1].lower()
+            if period_arg in ["month", "week", "day"]:
+                period = period_arg
+            else:
+                await update.message.reply_text(
+                    "❌ <b>Неверный период</b>\n\n"
+                    "Доступные периоды: month, week, day",
                     parse_mode='HTML'
                 )
                 return
-            
-            # Получение операций за текущий год
-            from_date = datetime(datetime.now(timezone.utc).year, 1, 1, tzinfo=timezone.utc)
-            to_date = datetime.now(timezone.utc)
-            
-            operations = await self.operations_cache.get_operations(
-                account_id=active_account.account_id,
-                from_date=from_date,
-                to_date=to_date
+        
+        # Отправка уведомления и получение активного аккаунта параллельно
+        processing_msg, active_account = await asyncio.gather(
+            update.message.reply_text(
+                f"⏳ Загружаю операции по <b>{ticker_html}</b>...",
+                parse_mode='HTML'
+            ),
+            self._get_active_account()
+        )
+        if not active_account:
+            await processing_msg.edit_text(
+                "❌ Активный аккаунт не найден",
+                parse_mode='HTML'
             )
-            
-            # Фильтрация по тикеру
-            instrument_operations = [op for op in operations if op.get('ticker') == ticker]
-            
-            if not instrument_operations:
-                await processing_msg.edit_text(
-                    f"📭 <b>Нет операций по {ticker}</b>\n\n"
-                    f"За период: {from_date.strftime('%d.%m.%Y')} - {to_date.strftime('%d.%m.%Y')}",
-                    parse_mode='HTML'
-                )
-                return
-            
-            # Расчет статистики
-            stats = self.statistics_calculator.calculate_statistics(instrument_operations, period=period)
-            
-            # Форматирование отчета
-            report = self.report_formatter.format_instrument_report(
-                stats, 
-                ticker=ticker, 
-                period=period,
-                start_year=datetime.now().year
+            return
+        
+        # Получение операций за текущий год
+        now = datetime.now(timezone.utc)
+        from_date = _year_start_utc(now.year)
+        to_date = now
+        
+        # Фильтрация по тикеру выполняется на стороне кэша операций
+        instrument_operations = await self.operations_cache.get_operations(
+            account_id=active_account.account_id,
+            from_date=from_date,
+            to_date=to_date,
+            ticker=ticker
+        )
+        
+        if not instrument_operations:
+            await processing_msg.edit_text(
+                f"📭 <b>Нет операций по {ticker_html}</b>\n\n"
+                f"За период: {from_date.strftime('%d.%m.%Y')} - {to_date.strftime('%d.%m.%Y')}",
+                parse_mode='HTML'
             )
-            
-            # Отправка отчета
-            if len(report) > 4096:
-                parts = [report[i:i+4096] for i in range(0, len(report), 4096)]
-                await processing_msg.delete()
-                for part in parts:
-                    await update.message.reply_text(part, parse_mode='HTML')
-            else:
-                await processing_msg.edit_text(report, parse_mode='HTML')
-            
-        except Exception as e:
-            logger.error(f"Ошибка в cmd_stats_instrument: {e}", exc_info=True)
-            await update.message.reply_text(f"❌ Ошибка: {str(e)}")
+            return
+        
+        # Расчет статистики
+        stats = self.statistics_calculator.calculate_statistics(instrument_operations, period=period)
+        
+        # Форматирование отчета
+        report = self.report_formatter.format_instrument_report(
+            stats, 
+            ticker=ticker, 
+            period=period,
+            start_year=now.year
+        )
+        
+        # Отправка отчета (может быть длинным, разбиваем если нужно)
+        await self._send_report(update, processing_msg.edit_text, report)
@@ -2,12 +2,20 @@
 Интерактивное меню настроек для Telegram бота
 """
 
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import asyncio
+from collections import deque
+from functools import lru_cache
+from html import escape
+import re
+from typing import Awaitable, Callable, Optional, Set
+from telegram import CallbackQuery, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 import json
 
+from src.bot.handlers.base import parse_chat_id
 from src.config.settings_manager import SettingsManager
 from src.storage.database import Database
+from src.storage.models import Account
 from src.utils.logger import get_logger
 
 logger = get_logger("bot.settings_menu")
@@ -38,6 +46,114 @@ logger = get_logger("bot.settings_menu")
     EDIT_INSTRUMENT_TP_ACTIVATION,
 ) = range(22)
 
+# Статические клавиатуры меню: объекты InlineKeyboardMarkup неизменяемы,
+# поэтому создаются один раз при импорте и переиспользуются
+
+# Главное меню настроек
+MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
+    [InlineKeyboardButton("📈 Настройки инструментов", callback_data="instrument_list")],
+    [InlineKeyboardButton("📋 Просмотр всех настроек", callback_data="view_all")],
+    [InlineKeyboardButton("◀️ Закрыть", callback_data="close")]
+])
+
+# Раздел глобальных настроек
+GLOBAL_SETTINGS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✏️ Изменить SL", callback_data="edit_global_sl")],
+    [InlineKeyboardButton("✏️ Изменить TP", callback_data="edit_global_tp")],
+    [InlineKeyboardButton("🔔 Активация SL", callback_data="edit_global_sl_activation")],
+    [InlineKeyboardButton("🔔 Активация TP", callback_data="edit_global_tp_activation")],
+    [InlineKeyboardButton("🎯 Настроить Multi-TP", callback_data="global_multi_tp")],
+    [InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]
+])
+
+# Возврат в главное меню
+BACK_TO_MAIN_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]
+])
+
+# Отмена ввода глобального значения
+CANCEL_TO_GLOBAL_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Отмена", callback_data="global_settings")]
+])
+
+# Отмена добавления инструмента
+CANCEL_TO_INSTRUMENT_LIST_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Отмена", callback_data="instrument_list")]
+])
+
+# Переходы после сохранения глобальной настройки
+AFTER_GLOBAL_SAVE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
+    [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
+])
+
+# Переходы после изменения списка инструментов
+AFTER_INSTRUMENT_CHANGE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📈 Настройки инструментов", callback_data="instrument_list")],
+    [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
+])
+
+# Переходы после изменения уровней Multi-TP
+AFTER_MULTI_TP_CHANGE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Multi-TP", callback_data="show_multi_tp")],
+    [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
+])
+
+# Отмена добавления уровня Multi-TP
+CANCEL_ADD_LEVEL_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Отмена", callback_data="cancel_add_level")]
+])
+
+# Отмена редактирования уровня Multi-TP
+CANCEL_EDIT_LEVEL_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("❌ Отмена", callback_data="cancel_edit_level")]
+])
+
+
+# Фиксированные фрагменты сводки "Все настройки"
+VIEW_ALL_HEADER = "📋 <b>ВСЕ НАСТРОЙКИ</b>\n\n"
+VIEW_ALL_DEFAULT_GLOBALS = (
+    "🌍 <b>Глобальные (по умолчанию):</b>\n"
+    "  🛑 SL: 0.4%\n"
+    "  🎯 TP: 1.0%\n"
+    "  🎯 Multi-TP: выключен\n\n"
+)
+VIEW_ALL_INSTRUMENTS_HEADER = "📈 <b>Инструменты с индивидуальными настройками:</b>\n\n"
+VIEW_ALL_OTHERS_GLOBAL_FOOTER = "\n<i>Остальные инструменты используют глобальные настройки</i>"
+VIEW_ALL_ALL_GLOBAL_FOOTER = "<i>Все инструменты используют глобальные настройки</i>"
+
+# Сколько последних подтвержденных callback query помнить, чтобы
+# не отправлять answerCallbackQuery повторно (Telegram его отклоняет)
+ANSWERED_CALLBACKS_LIMIT = 64
+
+# Допустимый тикер инструмента: латинские буквы, цифры и символы "._-",
+# не длиннее 12 символов (тикер выводится в HTML и входит в callback_data)
+TICKER_PATTERN = re.compile(r"^[A-Z0-9._-]{1,12}$")
+
+
+@lru_cache(maxsize=64)
+def _count_multi_tp_levels(levels_json: Optional[str]) -> int:
+    """
+    Количество уровней Multi-TP в JSON-строке настроек
+    
+    Строка не меняется до сохранения новых уровней, поэтому результат
+    разбора кэшируется по ее значению.
+    
+    Args:
+        levels_json: JSON-список уровней или None
+        
+    Returns:
+        int: Количество уровней (0, если строка пуста или повреждена)
+    """
+    if not levels_json:
+        return 0
+    try:
+        return len(json.loads(levels_json))
+    except (TypeError, ValueError) as e:
+        logger.warning("Не удалось разобрать уровни Multi-TP: {}", e)
+        return 0
+
 
 class SettingsMenu:
     """
@@ -48,7 +164,8 @@ class SettingsMenu:
         self,
         settings_manager: SettingsManager,
         database: Database,
-        chat_id: str
+        chat_id: str,
+        active_account_getter: Optional[Callable[[], Awaitable[Optional[Account]]]] = None
     ):
         """
         Инициализация меню настроек
@@ -57,14 +174,55 @@ class SettingsMenu:
             settings_manager: Менеджер настроек
             database: База данных
             chat_id: ID чата для проверки авторизации
+            active_account_getter: Функция получения активного аккаунта
+                (например, из кэша бота); по умолчанию - запрос к БД
         """
         self.settings_manager = settings_manager
         self.db = database
         self.chat_id = chat_id
+        self._chat_id_int = parse_chat_id(chat_id)
+        self._get_active_account = active_account_getter or database.get_active_account
+        # Ссылки на фоновые ответы на callback, чтобы задачи не собрал GC
+        self._answer_tasks: Set[asyncio.Task] = set()
+        # ID уже подтвержденных callback query
+        self._answered_callbacks = deque(maxlen=ANSWERED_CALLBACKS_LIMIT)
     
     def _check_auth(self, update: Update) -> bool:
         """Проверка авторизации пользователя"""
-        return str(update.effective_chat.id) == self.chat_id
+        return update.effective_chat.id == self._chat_id_int
+    
+    def _answer_in_background(
+        self,
+        query: CallbackQuery,
+        text: Optional[str] = None,
+        show_alert: bool = False
+    ) -> None:
+        """
+        Подтвердить callback без ожидания ответа Telegram
+        
+        Порядок answerCallbackQuery и последующего редактирования сообщения
+        не важен, поэтому подтверждение выполняется параллельно с запросами к БД.
+        Callback подтверждается только один раз: повторные вызовы для того же
+        query (например, при переходе в другое меню после уведомления) игнорируются.
+        
+        Args:
+            query: Callback query для подтверждения
+            text: Текст уведомления
+            show_alert: Показать уведомление как alert
+        """
+        if query.id in self._answered_callbacks:
+            return
+        self._answered_callbacks.append(query.id)
+        
+        task = asyncio.create_task(query.answer(text, show_alert=show_alert))
+        self._answer_tasks.add(task)
+        task.add_done_callback(self._on_answer_done)
+    
+    def _on_answer_done(self, task: asyncio.Task) -> None:
+        """Убрать завершенную задачу подтверждения и залогировать ошибку"""
+        self._answer_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Не удалось подтвердить callback: {}", task.exception())
     
     # ==================== ГЛАВНОЕ МЕНЮ ====================
     
@@ -74,13 +232,7 @@ class SettingsMenu:
             await update.message.reply_text("❌ Доступ запрещен")
             return ConversationHandler.END
         
-        keyboard = [
-            [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
-            [InlineKeyboardButton("📈 Настройки инструментов", callback_data="instrument_list")],
-            [InlineKeyboardButton("📋 Просмотр всех настроек", callback_data="view_all")],
-            [InlineKeyboardButton("◀️ Закрыть", callback_data="close")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = MAIN_MENU_MARKUP
         
         text = (
             "⚙️ <b>НАСТРОЙКИ AUTO-STOP</b>\n\n"
@@ -107,10 +259,10 @@ class SettingsMenu:
     async def show_global_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать глобальные настройки"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text(
                 "❌ Активный аккаунт не найден",
@@ -125,53 +277,40 @@ class SettingsMenu:
             # Создать настройки по умолчанию
             settings = await self.settings_manager.create_global_settings(active_account.account_id)
         
-        # Парсинг Multi-TP уровней
+        # Количество Multi-TP уровней
         multi_tp_status = "✅ Включен" if settings.multi_tp_enabled else "❌ Выключен"
-        multi_tp_levels_count = 0
-        if settings.multi_tp_levels:
-            try:
-                levels = json.loads(settings.multi_tp_levels)
-                multi_tp_levels_count = len(levels)
-            except:
-                pass
+        multi_tp_levels_count = _count_multi_tp_levels(settings.multi_tp_levels)
         
         # Статус активации
         sl_activation_status = "✅" if settings.sl_activation_pct is not None else "❌"
         tp_activation_status = "✅" if settings.tp_activation_pct is not None else "❌"
         
-        keyboard = [
-            [InlineKeyboardButton("✏️ Изменить SL", callback_data="edit_global_sl")],
-            [InlineKeyboardButton("✏️ Изменить TP", callback_data="edit_global_tp")],
-            [InlineKeyboardButton("🔔 Активация SL", callback_data="edit_global_sl_activation")],
-            [InlineKeyboardButton("🔔 Активация TP", callback_data="edit_global_tp_activation")],
-            [InlineKeyboardButton("🎯 Настроить Multi-TP", callback_data="global_multi_tp")],
-            [InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = GLOBAL_SETTINGS_MARKUP
         
-        text = (
+        parts = [
             "🌍 <b>ГЛОБАЛЬНЫЕ НАСТРОЙКИ</b>\n"
             "<i>(применяются ко всем инструментам по умолчанию)</i>\n\n"
             "┌─────────────────────────┐\n"
             f"│ 🛑 Stop Loss: <b>{settings.stop_loss_pct}%</b>\n"
             f"│ 🎯 Take Profit: <b>{settings.take_profit_pct}%</b>\n"
             f"│ 🔔 Активация SL: {sl_activation_status} "
-        )
+        ]
         
         if settings.sl_activation_pct is not None:
-            text += f"<b>{settings.sl_activation_pct}%</b>"
+            parts.append(f"<b>{settings.sl_activation_pct}%</b>")
         
-        text += f"\n│ 🔔 Активация TP: {tp_activation_status} "
+        parts.append(f"\n│ 🔔 Активация TP: {tp_activation_status} ")
         
         if settings.tp_activation_pct is not None:
-            text += f"<b>{settings.tp_activation_pct}%</b>"
+            parts.append(f"<b>{settings.tp_activation_pct}%</b>")
         
-        text += f"\n│ 🎯 Multi-TP: {multi_tp_status}"
+        parts.append(f"\n│ 🎯 Multi-TP: {multi_tp_status}")
         
         if multi_tp_levels_count > 0:
-            text += f" ({multi_tp_levels_count} ур.)"
+            parts.append(f" ({multi_tp_levels_count} ур.)")
         
-        text += "\n└─────────────────────────┘"
+        parts.append("\n└─────────────────────────┘")
+        text = "".join(parts)
         
         await query.edit_message_text(
             text=text,
@@ -186,10 +325,10 @@ class SettingsMenu:
     async def show_instrument_list(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать список инструментов с настройками"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -236,68 +375,63 @@ class SettingsMenu:
     async def view_all_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать все настройки (глобальные + инструменты)"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
         
-        # Получить глобальные настройки
-        global_settings = await self.settings_manager.get_global_settings(active_account.account_id)
+        # Глобальные настройки и инструменты не зависят друг от друга
+        global_settings, instruments = await asyncio.gather(
+            self.settings_manager.get_global_settings(active_account.account_id),
+            self.settings_manager.get_all_instruments(active_account.account_id)
+        )
         
-        text = "📋 <b>ВСЕ НАСТРОЙКИ</b>\n\n"
+        parts = [VIEW_ALL_HEADER]
         
         # Глобальные настройки
         if global_settings:
             multi_tp_status = "включен" if global_settings.multi_tp_enabled else "выключен"
-            text += (
+            parts.append(
                 "🌍 <b>Глобальные (по умолчанию):</b>\n"
                 f"  🛑 SL: {global_settings.stop_loss_pct}%\n"
                 f"  🎯 TP: {global_settings.take_profit_pct}%\n"
                 f"  🎯 Multi-TP: {multi_tp_status}\n\n"
             )
         else:
-            text += (
-                "🌍 <b>Глобальные (по умолчанию):</b>\n"
-                "  🛑 SL: 0.4%\n"
-                "  🎯 TP: 1.0%\n"
-                "  🎯 Multi-TP: выключен\n\n"
-            )
+            parts.append(VIEW_ALL_DEFAULT_GLOBALS)
         
         # Инструменты с индивидуальными настройками
-        instruments = await self.settings_manager.get_all_instruments(active_account.account_id)
-        
         if instruments:
-            text += "📈 <b>Инструменты с индивидуальными настройками:</b>\n\n"
+            parts.append(VIEW_ALL_INSTRUMENTS_HEADER)
             for inst in instruments:
-                text += f"<b>{inst.ticker}</b>:\n"
-                
                 if inst.stop_loss_pct is not None:
-                    text += f"  🛑 SL: {inst.stop_loss_pct}% ✏️\n"
+                    sl_line = f"  🛑 SL: {inst.stop_loss_pct}% ✏️\n"
                 else:
-                    text += "  🛑 SL: глобальные\n"
+                    sl_line = "  🛑 SL: глобальные\n"
                 
                 if inst.take_profit_pct is not None:
-                    text += f"  🎯 TP: {inst.take_profit_pct}% ✏️\n"
+                    tp_line = f"  🎯 TP: {inst.take_profit_pct}% ✏️\n"
                 else:
-                    text += "  🎯 TP: глобальные\n"
+                    tp_line = "  🎯 TP: глобальные\n"
                 
                 if inst.multi_tp_enabled is not None:
                     status = "включен ✏️" if inst.multi_tp_enabled else "выключен ✏️"
-                    text += f"  🎯 Multi-TP: {status}\n"
+                    multi_tp_line = f"  🎯 Multi-TP: {status}\n"
                 else:
-                    text += "  🎯 Multi-TP: глобальные\n"
+                    multi_tp_line = "  🎯 Multi-TP: глобальные\n"
                 
-                text += "\n"
+                parts.extend((f"<b>{escape(inst.ticker)}</b>:\n", sl_line, tp_line, multi_tp_line, "\n"))
             
-            text += "\n<i>Остальные инструменты используют глобальные настройки</i>"
+            parts.append(VIEW_ALL_OTHERS_GLOBAL_FOOTER)
         else:
-            text += "<i>Все инструменты используют глобальные настройки</i>"
+            parts.append(VIEW_ALL_ALL_GLOBAL_FOOTER)
         
-        keyboard = [[InlineKeyboardButton("◀️ Назад", callback_data="main_menu")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        text = "".join(parts)
+        
+        reply_markup = BACK_TO_MAIN_MARKUP
         
         await query.edit_message_text(
             text=text,
@@ -309,45 +443,15 @@ class SettingsMenu:
     
     # ==================== ОБРАБОТЧИКИ CALLBACK ====================
     
-    async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик callback кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        data = query.data
-        
-        # Главное меню
-        if data == "main_menu":
-            return await self.show_main_menu(update, context)
-        
-        # Глобальные настройки
-        elif data == "global_settings":
-            return await self.show_global_settings(update, context)
-        
-        # Список инструментов
-        elif data == "instrument_list":
-            return await self.show_instrument_list(update, context)
-        
-        # Просмотр всех настроек
-        elif data == "view_all":
-            return await self.view_all_settings(update, context)
-        
-        # Закрыть меню
-        elif data == "close":
-            await query.edit_message_text("✅ Меню закрыто")
-            return ConversationHandler.END
-        
-        return MAIN_MENU
-    
     # ==================== РЕДАКТИРОВАНИЕ ГЛОБАЛЬНЫХ НАСТРОЕК ====================
     
     async def edit_global_sl(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать редактирование глобального Stop Loss"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить текущее значение
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -355,8 +459,7 @@ class SettingsMenu:
         settings = await self.settings_manager.get_global_settings(active_account.account_id)
         current_sl = settings.stop_loss_pct if settings else 0.4
         
-        keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="global_settings")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CANCEL_TO_GLOBAL_MARKUP
         
         text = (
             "✏️ <b>Изменить глобальный Stop Loss</b>\n\n"
@@ -392,7 +495,7 @@ class SettingsMenu:
                 return EDIT_SL
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -403,26 +506,17 @@ class SettingsMenu:
                 stop_loss_pct=value
             )
             
-            await update.message.reply_text(
-                f"✅ Глобальный Stop Loss обновлен: <b>{value}%</b>\n\n"
-                "Возвращаюсь в меню настроек...",
-                parse_mode='HTML'
-            )
-            
             # Показать меню глобальных настроек
-            # Создаем фейковый callback query для возврата в меню
             context.user_data['return_to'] = 'global_settings'
             
-            # Отправляем новое сообщение с меню
-            keyboard = [
-                [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            # Подтверждение и меню - одним сообщением
+            reply_markup = AFTER_GLOBAL_SAVE_MARKUP
             
             await update.message.reply_text(
+                f"✅ Глобальный Stop Loss обновлен: <b>{value}%</b>\n\n"
                 "⚙️ Выберите действие:",
-                reply_markup=reply_markup
+                reply_markup=reply_markup,
+                parse_mode='HTML'
             )
             
             return MAIN_MENU
@@ -436,10 +530,10 @@ class SettingsMenu:
     async def edit_global_tp(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать редактирование глобального Take Profit"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить текущее значение
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -447,8 +541,7 @@ class SettingsMenu:
         settings = await self.settings_manager.get_global_settings(active_account.account_id)
         current_tp = settings.take_profit_pct if settings else 1.0
         
-        keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="global_settings")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CANCEL_TO_GLOBAL_MARKUP
         
         text = (
             "✏️ <b>Изменить глобальный Take Profit</b>\n\n"
@@ -484,7 +577,7 @@ class SettingsMenu:
                 return EDIT_TP
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -495,22 +588,14 @@ class SettingsMenu:
                 take_profit_pct=value
             )
             
-            await update.message.reply_text(
-                f"✅ Глобальный Take Profit обновлен: <b>{value}%</b>\n\n"
-                "Возвращаюсь в меню настроек...",
-                parse_mode='HTML'
-            )
-            
-            # Отправляем новое сообщение с меню
-            keyboard = [
-                [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            # Подтверждение и меню - одним сообщением
+            reply_markup = AFTER_GLOBAL_SAVE_MARKUP
             
             await update.message.reply_text(
+                f"✅ Глобальный Take Profit обновлен: <b>{value}%</b>\n\n"
                 "⚙️ Выберите действие:",
-                reply_markup=reply_markup
+                reply_markup=reply_markup,
+                parse_mode='HTML'
             )
             
             return MAIN_MENU
@@ -523,52 +608,14 @@ class SettingsMenu:
     
     # ==================== ОБНОВЛЕННЫЕ ОБРАБОТЧИКИ CALLBACK ====================
     
-    async def handle_callback_extended(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Расширенный обработчик callback кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        data = query.data
-        
-        # Главное меню
-        if data == "main_menu":
-            return await self.show_main_menu(update, context)
-        
-        # Глобальные настройки
-        elif data == "global_settings":
-            return await self.show_global_settings(update, context)
-        
-        # Редактирование глобальных настроек
-        elif data == "edit_global_sl":
-            return await self.edit_global_sl(update, context)
-        
-        elif data == "edit_global_tp":
-            return await self.edit_global_tp(update, context)
-        
-        # Список инструментов
-        elif data == "instrument_list":
-            return await self.show_instrument_list(update, context)
-        
-        # Просмотр всех настроек
-        elif data == "view_all":
-            return await self.view_all_settings(update, context)
-        
-        # Закрыть меню
-        elif data == "close":
-            await query.edit_message_text("✅ Меню закрыто")
-            return ConversationHandler.END
-        
-        return MAIN_MENU
-    
     # ==================== НАСТРОЙКИ ИНСТРУМЕНТОВ ====================
     
     async def add_instrument_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать добавление нового инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
-        keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="instrument_list")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CANCEL_TO_INSTRUMENT_LIST_MARKUP
         
         text = (
             "➕ <b>Добавить инструмент</b>\n\n"
@@ -590,14 +637,15 @@ class SettingsMenu:
         ticker = update.message.text.strip().upper()
         
         # Валидация тикера
-        if not ticker or len(ticker) > 12:
+        if not TICKER_PATTERN.match(ticker):
             await update.message.reply_text(
-                "❌ Неверный тикер. Введите корректный тикер (до 12 символов):"
+                "❌ Неверный тикер. Введите тикер из латинских букв, цифр "
+                "и символов . _ - (до 12 символов):"
             )
             return ADD_INSTRUMENT
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await update.message.reply_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -609,11 +657,7 @@ class SettingsMenu:
         )
         
         if existing:
-            await update.message.reply_text(
-                f"⚠️ Инструмент <b>{ticker}</b> уже добавлен\n\n"
-                "Возвращаюсь в список...",
-                parse_mode='HTML'
-            )
+            text = f"⚠️ Инструмент <b>{escape(ticker)}</b> уже добавлен\n\n"
         else:
             # Создать настройки (пока пустые, будут использоваться глобальные)
             await self.settings_manager.create_instrument_settings(
@@ -621,23 +665,19 @@ class SettingsMenu:
                 ticker
             )
             
-            await update.message.reply_text(
-                f"✅ Инструмент <b>{ticker}</b> добавлен\n\n"
+            text = (
+                f"✅ Инструмент <b>{escape(ticker)}</b> добавлен\n\n"
                 "Сейчас он использует глобальные настройки.\n"
-                "Вы можете настроить индивидуальные параметры.",
-                parse_mode='HTML'
+                "Вы можете настроить индивидуальные параметры.\n\n"
             )
         
-        # Вернуться к списку инструментов
-        keyboard = [
-            [InlineKeyboardButton("📈 Настройки инструментов", callback_data="instrument_list")],
-            [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Подтверждение и возврат к списку инструментов - одним сообщением
+        reply_markup = AFTER_INSTRUMENT_CHANGE_MARKUP
         
         await update.message.reply_text(
-            "⚙️ Выберите действие:",
-            reply_markup=reply_markup
+            text + "⚙️ Выберите действие:",
+            reply_markup=reply_markup,
+            parse_mode='HTML'
         )
         
         return MAIN_MENU
@@ -645,22 +685,16 @@ class SettingsMenu:
     async def show_instrument_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Показать настройки конкретного инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
         
-        # Получить эффективные настройки
-        effective = await self.settings_manager.get_effective_settings(
-            active_account.account_id,
-            ticker
-        )
-        
-        # Получить настройки инструмента
-        inst_settings = await self.settings_manager.get_instrument_settings(
+        # Получить эффективные настройки и настройки инструмента
+        effective, inst_settings = await self.settings_manager.get_effective_and_instrument(
             active_account.account_id,
             ticker
         )
@@ -719,7 +753,7 @@ class SettingsMenu:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         text = (
-            f"📈 <b>{ticker}</b>\n\n"
+            f"📈 <b>{escape(ticker)}</b>\n\n"
             "Используются настройки:\n"
             "┌─────────────────────────┐\n"
             f"│ 🛑 SL: <b>{sl_text}</b> ({sl_source})\n"
@@ -741,10 +775,10 @@ class SettingsMenu:
     async def reset_instrument_settings(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Сбросить настройки инструмента на глобальные"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -760,7 +794,7 @@ class SettingsMenu:
             multi_tp_sl_strategy=None
         )
         
-        await query.answer("✅ Настройки сброшены на глобальные", show_alert=True)
+        self._answer_in_background(query, "✅ Настройки сброшены на глобальные", show_alert=True)
         
         # Показать обновленные настройки
         return await self.show_instrument_settings(update, context, ticker)
@@ -768,10 +802,10 @@ class SettingsMenu:
     async def delete_instrument(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Удалить инструмент из настроек"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -783,9 +817,9 @@ class SettingsMenu:
         )
         
         if deleted:
-            await query.answer(f"✅ Инструмент {ticker} удален", show_alert=True)
+            self._answer_in_background(query, f"✅ Инструмент {ticker} удален", show_alert=True)
         else:
-            await query.answer(f"⚠️ Инструмент {ticker} не найден", show_alert=True)
+            self._answer_in_background(query, f"⚠️ Инструмент {ticker} не найден", show_alert=True)
         
         # Вернуться к списку
         return await self.show_instrument_list(update, context)
@@ -795,10 +829,10 @@ class SettingsMenu:
     async def edit_instrument_sl(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Начать редактирование Stop Loss для инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -816,7 +850,7 @@ class SettingsMenu:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         text = (
-            f"✏️ <b>Изменить Stop Loss для {ticker}</b>\n\n"
+            f"✏️ <b>Изменить Stop Loss для {escape(ticker)}</b>\n\n"
             f"Текущее значение: <b>{current_sl}%</b> ({source})\n\n"
             "Введите новое значение в процентах:\n"
             "Примеры: <code>0.5</code>, <code>1.0</code>, <code>2.5</code>\n\n"
@@ -856,7 +890,7 @@ class SettingsMenu:
                 return ConversationHandler.END
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -869,7 +903,7 @@ class SettingsMenu:
             )
             
             await update.message.reply_text(
-                f"✅ Stop Loss для <b>{ticker}</b> обновлен: <b>{value}%</b>\n\n"
+                f"✅ Stop Loss для <b>{escape(ticker)}</b> обновлен: <b>{value}%</b>\n\n"
                 "Возвращаюсь в меню настроек...",
                 parse_mode='HTML'
             )
@@ -898,10 +932,10 @@ class SettingsMenu:
     async def edit_instrument_tp(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Начать редактирование Take Profit для инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -919,7 +953,7 @@ class SettingsMenu:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         text = (
-            f"✏️ <b>Изменить Take Profit для {ticker}</b>\n\n"
+            f"✏️ <b>Изменить Take Profit для {escape(ticker)}</b>\n\n"
             f"Текущее значение: <b>{current_tp}%</b> ({source})\n\n"
             "Введите новое значение в процентах:\n"
             "Примеры: <code>1.0</code>, <code>2.5</code>, <code>5.0</code>\n\n"
@@ -959,7 +993,7 @@ class SettingsMenu:
                 return ConversationHandler.END
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -972,7 +1006,7 @@ class SettingsMenu:
             )
             
             await update.message.reply_text(
-                f"✅ Take Profit для <b>{ticker}</b> обновлен: <b>{value}%</b>\n\n"
+                f"✅ Take Profit для <b>{escape(ticker)}</b> обновлен: <b>{value}%</b>\n\n"
                 "Возвращаюсь в меню настроек...",
                 parse_mode='HTML'
             )
@@ -1003,10 +1037,10 @@ class SettingsMenu:
     async def edit_global_sl_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать редактирование глобальной активации Stop Loss"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить текущее значение
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1050,10 +1084,10 @@ class SettingsMenu:
     async def disable_global_sl_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Отключить глобальную активацию Stop Loss"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1064,7 +1098,7 @@ class SettingsMenu:
             sl_activation_pct=None
         )
         
-        await query.answer("✅ Активация SL отключена", show_alert=True)
+        self._answer_in_background(query, "✅ Активация SL отключена", show_alert=True)
         
         # Вернуться в меню глобальных настроек
         return await self.show_global_settings(update, context)
@@ -1084,7 +1118,7 @@ class SettingsMenu:
                 return EDIT_SL_ACTIVATION
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -1121,11 +1155,7 @@ class SettingsMenu:
             )
             
             # Отправляем новое сообщение с меню
-            keyboard = [
-                [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = AFTER_GLOBAL_SAVE_MARKUP
             
             await update.message.reply_text(
                 "⚙️ Выберите действие:",
@@ -1143,10 +1173,10 @@ class SettingsMenu:
     async def edit_global_tp_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать редактирование глобальной активации Take Profit"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить текущее значение
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1190,10 +1220,10 @@ class SettingsMenu:
     async def disable_global_tp_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Отключить глобальную активацию Take Profit"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1204,7 +1234,7 @@ class SettingsMenu:
             tp_activation_pct=None
         )
         
-        await query.answer("✅ Активация TP отключена", show_alert=True)
+        self._answer_in_background(query, "✅ Активация TP отключена", show_alert=True)
         
         # Вернуться в меню глобальных настроек
         return await self.show_global_settings(update, context)
@@ -1224,7 +1254,7 @@ class SettingsMenu:
                 return EDIT_TP_ACTIVATION
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -1261,11 +1291,7 @@ class SettingsMenu:
             )
             
             # Отправляем новое сообщение с меню
-            keyboard = [
-                [InlineKeyboardButton("🌍 Глобальные настройки", callback_data="global_settings")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = AFTER_GLOBAL_SAVE_MARKUP
             
             await update.message.reply_text(
                 "⚙️ Выберите действие:",
@@ -1283,22 +1309,16 @@ class SettingsMenu:
     async def edit_instrument_sl_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Начать редактирование активации Stop Loss для инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
         
-        # Получить эффективные настройки
-        effective = await self.settings_manager.get_effective_settings(
-            active_account.account_id,
-            ticker
-        )
-        
-        # Получить настройки инструмента
-        inst_settings = await self.settings_manager.get_instrument_settings(
+        # Получить эффективные настройки и настройки инструмента
+        effective, inst_settings = await self.settings_manager.get_effective_and_instrument(
             active_account.account_id,
             ticker
         )
@@ -1322,7 +1342,7 @@ class SettingsMenu:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         text = (
-            f"🔔 <b>Изменить активацию Stop Loss для {ticker}</b>\n\n"
+            f"🔔 <b>Изменить активацию Stop Loss для {escape(ticker)}</b>\n\n"
             f"Текущее значение: <b>{current_sl_activation if current_sl_activation is not None else 'не задана'}</b> ({source})\n\n"
             "Введите новое значение в процентах:\n"
             "Примеры: <code>0.2</code>, <code>0.3</code>\n\n"
@@ -1346,10 +1366,10 @@ class SettingsMenu:
     async def disable_instrument_sl_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Отключить активацию Stop Loss для инструмента"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1361,7 +1381,7 @@ class SettingsMenu:
             sl_activation_pct=0  # Явно задаем 0, чтобы отличать от NULL (глобальные)
         )
         
-        await query.answer("✅ Активация SL отключена для инструмента", show_alert=True)
+        self._answer_in_background(query, "✅ Активация SL отключена для инструмента", show_alert=True)
         
         # Вернуться в меню настроек инструмента
         return await self.show_instrument_settings(update, context, ticker)
@@ -1369,10 +1389,10 @@ class SettingsMenu:
     async def reset_instrument_sl_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Сбросить активацию Stop Loss для инструмента на глобальные"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1384,7 +1404,7 @@ class SettingsMenu:
             sl_activation_pct=None  # NULL = использовать глобальные
         )
         
-        await query.answer("✅ Активация SL сброшена на глобальные", show_alert=True)
+        self._answer_in_background(query, "✅ Активация SL сброшена на глобальные", show_alert=True)
         
         # Вернуться в меню настроек инструмента
         return await self.show_instrument_settings(update, context, ticker)
@@ -1410,7 +1430,7 @@ class SettingsMenu:
                 return ConversationHandler.END
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -1445,7 +1465,7 @@ class SettingsMenu:
             )
             
             await update.message.reply_text(
-                f"✅ Активация Stop Loss для <b>{ticker}</b> обновлена: <b>{value}%</b>\n\n"
+                f"✅ Активация Stop Loss для <b>{escape(ticker)}</b> обновлена: <b>{value}%</b>\n\n"
                 "Возвращаюсь в меню настроек...",
                 parse_mode='HTML'
             )
@@ -1474,22 +1494,16 @@ class SettingsMenu:
     async def edit_instrument_tp_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Начать редактирование активации Take Profit для инструмента"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
         
-        # Получить эффективные настройки
-        effective = await self.settings_manager.get_effective_settings(
-            active_account.account_id,
-            ticker
-        )
-        
-        # Получить настройки инструмента
-        inst_settings = await self.settings_manager.get_instrument_settings(
+        # Получить эффективные настройки и настройки инструмента
+        effective, inst_settings = await self.settings_manager.get_effective_and_instrument(
             active_account.account_id,
             ticker
         )
@@ -1513,7 +1527,7 @@ class SettingsMenu:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         text = (
-            f"🔔 <b>Изменить активацию Take Profit для {ticker}</b>\n\n"
+            f"🔔 <b>Изменить активацию Take Profit для {escape(ticker)}</b>\n\n"
             f"Текущее значение: <b>{current_tp_activation if current_tp_activation is not None else 'не задана'}</b> ({source})\n\n"
             "Введите новое значение в процентах:\n"
             "Примеры: <code>0.5</code>, <code>0.7</code>\n\n"
@@ -1537,10 +1551,10 @@ class SettingsMenu:
     async def disable_instrument_tp_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Отключить активацию Take Profit для инструмента"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1552,7 +1566,7 @@ class SettingsMenu:
             tp_activation_pct=0  # Явно задаем 0, чтобы отличать от NULL (глобальные)
         )
         
-        await query.answer("✅ Активация TP отключена для инструмента", show_alert=True)
+        self._answer_in_background(query, "✅ Активация TP отключена для инструмента", show_alert=True)
         
         # Вернуться в меню настроек инструмента
         return await self.show_instrument_settings(update, context, ticker)
@@ -1560,10 +1574,10 @@ class SettingsMenu:
     async def reset_instrument_tp_activation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, ticker: str):
         """Сбросить активацию Take Profit для инструмента на глобальные"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1575,7 +1589,7 @@ class SettingsMenu:
             tp_activation_pct=None  # NULL = использовать глобальные
         )
         
-        await query.answer("✅ Активация TP сброшена на глобальные", show_alert=True)
+        self._answer_in_background(query, "✅ Активация TP сброшена на глобальные", show_alert=True)
         
         # Вернуться в меню настроек инструмента
         return await self.show_instrument_settings(update, context, ticker)
@@ -1601,7 +1615,7 @@ class SettingsMenu:
                 return ConversationHandler.END
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -1636,7 +1650,7 @@ class SettingsMenu:
             )
             
             await update.message.reply_text(
-                f"✅ Активация Take Profit для <b>{ticker}</b> обновлена: <b>{value}%</b>\n\n"
+                f"✅ Активация Take Profit для <b>{escape(ticker)}</b> обновлена: <b>{value}%</b>\n\n"
                 "Возвращаюсь в меню настроек...",
                 parse_mode='HTML'
             )
@@ -1664,162 +1678,105 @@ class SettingsMenu:
     
     # ==================== ОБНОВЛЕННЫЕ ОБРАБОТЧИКИ CALLBACK ====================
     
+    # Кнопки с фиксированным callback_data: callback_data -> (метод, именованные аргументы)
+    _CALLBACKS = {
+        "main_menu": ("show_main_menu", {}),
+        "global_settings": ("show_global_settings", {}),
+        "edit_global_sl": ("edit_global_sl", {}),
+        "edit_global_tp": ("edit_global_tp", {}),
+        "edit_global_sl_activation": ("edit_global_sl_activation", {}),
+        "disable_global_sl_activation": ("disable_global_sl_activation", {}),
+        "edit_global_tp_activation": ("edit_global_tp_activation", {}),
+        "disable_global_tp_activation": ("disable_global_tp_activation", {}),
+        "global_multi_tp": ("show_multi_tp_menu", {"is_global": True}),
+        "toggle_global_multi_tp": ("toggle_multi_tp", {"is_global": True}),
+        "add_global_level": ("add_level_start", {}),
+        "edit_level_menu_global": ("edit_level_menu", {}),
+        "delete_level_menu_global": ("delete_level_menu", {}),
+        "instrument_list": ("show_instrument_list", {}),
+        "add_instrument": ("add_instrument_start", {}),
+        "view_all": ("view_all_settings", {}),
+    }
+    
+    # Кнопки с параметром в callback_data: префикс -> (метод, способ передачи
+    # параметра). Параметр - остаток строки после префикса: "ticker" передается
+    # как тикер, "multi_tp_ticker" - как тикер меню Multi-TP инструмента,
+    # "level" - как индекс уровня (число до первого "_"), None - метод сам
+    # разбирает callback_data
+    _PREFIX_CALLBACKS = {
+        "edit_level_": ("edit_level_start", "level"),
+        "delete_level_": ("delete_level_confirm", "level"),
+        "confirm_delete_": ("delete_level_execute", None),
+        "inst_multi_tp_": ("show_multi_tp_menu", "multi_tp_ticker"),
+        "toggle_inst_multi_tp_": ("toggle_multi_tp", "multi_tp_ticker"),
+        "add_inst_level_": ("add_level_start", None),
+        "edit_level_menu_": ("edit_level_menu", None),
+        "delete_level_menu_": ("delete_level_menu", None),
+        "instrument_": ("show_instrument_settings", "ticker"),
+        "edit_inst_sl_": ("edit_instrument_sl", "ticker"),
+        "edit_inst_tp_": ("edit_instrument_tp", "ticker"),
+        "edit_inst_sl_activation_": ("edit_instrument_sl_activation", "ticker"),
+        "disable_inst_sl_activation_": ("disable_instrument_sl_activation", "ticker"),
+        "reset_inst_sl_activation_": ("reset_instrument_sl_activation", "ticker"),
+        "edit_inst_tp_activation_": ("edit_instrument_tp_activation", "ticker"),
+        "disable_inst_tp_activation_": ("disable_instrument_tp_activation", "ticker"),
+        "reset_inst_tp_activation_": ("reset_instrument_tp_activation", "ticker"),
+        "reset_inst_": ("reset_instrument_settings", "ticker"),
+        "delete_inst_": ("delete_instrument", "ticker"),
+    }
+    
+    # Префиксы от длинных к коротким: "edit_inst_sl_activation_" должен
+    # проверяться раньше "edit_inst_sl_", "edit_level_menu_" - раньше "edit_level_"
+    _PREFIXES = tuple(sorted(_PREFIX_CALLBACKS, key=len, reverse=True))
+    
     async def handle_callback_full(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Полный обработчик callback кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        data = query.data
-        
-        # Главное меню
-        if data == "main_menu":
-            return await self.show_main_menu(update, context)
-        
-        # Глобальные настройки
-        elif data == "global_settings":
-            return await self.show_global_settings(update, context)
-        
-        # Редактирование глобальных настроек
-        elif data == "edit_global_sl":
-            return await self.edit_global_sl(update, context)
-        
-        elif data == "edit_global_tp":
-            return await self.edit_global_tp(update, context)
-        
-        # Активация SL/TP для глобальных настроек
-        elif data == "edit_global_sl_activation":
-            return await self.edit_global_sl_activation(update, context)
-        
-        elif data == "disable_global_sl_activation":
-            return await self.disable_global_sl_activation(update, context)
-        
-        elif data == "edit_global_tp_activation":
-            return await self.edit_global_tp_activation(update, context)
-        
-        elif data == "disable_global_tp_activation":
-            return await self.disable_global_tp_activation(update, context)
-        
-        # Multi-TP для глобальных настроек
-        elif data == "global_multi_tp":
-            return await self.show_multi_tp_menu(update, context, is_global=True)
-        
-        elif data == "toggle_global_multi_tp":
-            return await self.toggle_multi_tp(update, context, is_global=True)
-        
-        elif data == "add_global_level":
-            return await self.add_level_start(update, context)
+        """
+        Полный обработчик callback кнопок
         
-        elif data == "edit_level_menu_global":
-            return await self.edit_level_menu(update, context)
+        Обработчики сами подтверждают callback (в фоне или уведомлением);
+        если обработчик этого не сделал, callback подтверждается здесь.
+        """
+        query = update.callback_query
+        try:
+            return await self._route_callback(update, context, query.data)
+        finally:
+            self._answer_in_background(query)
+    
+    async def _route_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, data: str):
+        """Вызвать обработчик кнопки по callback_data"""
         
-        elif data == "delete_level_menu_global":
-            return await self.delete_level_menu(update, context)
+        # Кнопки с фиксированным callback_data
+        route = self._CALLBACKS.get(data)
+        if route:
+            method_name, kwargs = route
+            return await getattr(self, method_name)(update, context, **kwargs)
         
-        elif data == "show_multi_tp":
+        if data == "show_multi_tp":
             ctx = context.user_data.get('multi_tp_context', {})
             is_global = ctx.get('is_global', True)
             ticker = ctx.get('ticker')
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
-        # Редактирование уровня Multi-TP
-        elif data.startswith("edit_level_") and not data.startswith("edit_level_menu_"):
-            parts = data.replace("edit_level_", "").split("_")
-            level_index = int(parts[0])
-            return await self.edit_level_start(update, context, level_index)
-        
-        # Удаление уровня Multi-TP
-        elif data.startswith("delete_level_") and not data.startswith("delete_level_menu_"):
-            parts = data.replace("delete_level_", "").split("_")
-            level_index = int(parts[0])
-            return await self.delete_level_confirm(update, context, level_index)
-        
-        elif data.startswith("confirm_delete_"):
-            return await self.delete_level_execute(update, context)
-        
-        # Список инструментов
-        elif data == "instrument_list":
-            return await self.show_instrument_list(update, context)
-        
-        # Добавление инструмента
-        elif data == "add_instrument":
-            return await self.add_instrument_start(update, context)
-        
-        # Multi-TP для инструмента
-        elif data.startswith("inst_multi_tp_"):
-            ticker = data.replace("inst_multi_tp_", "")
-            return await self.show_multi_tp_menu(update, context, is_global=False, ticker=ticker)
-        
-        elif data.startswith("toggle_inst_multi_tp_"):
-            ticker = data.replace("toggle_inst_multi_tp_", "")
-            return await self.toggle_multi_tp(update, context, is_global=False, ticker=ticker)
-        
-        elif data.startswith("add_inst_level_"):
-            return await self.add_level_start(update, context)
-        
-        elif data.startswith("edit_level_menu_") and data != "edit_level_menu_global":
-            return await self.edit_level_menu(update, context)
-        
-        elif data.startswith("delete_level_menu_") and data != "delete_level_menu_global":
-            return await self.delete_level_menu(update, context)
-        
-        # Просмотр настроек инструмента
-        elif data.startswith("instrument_"):
-            ticker = data.replace("instrument_", "")
-            return await self.show_instrument_settings(update, context, ticker)
-        
-        # Редактирование SL/TP для инструмента
-        elif data.startswith("edit_inst_sl_") and not data.startswith("edit_inst_sl_activation_"):
-            ticker = data.replace("edit_inst_sl_", "")
-            return await self.edit_instrument_sl(update, context, ticker)
-        
-        elif data.startswith("edit_inst_tp_") and not data.startswith("edit_inst_tp_activation_"):
-            ticker = data.replace("edit_inst_tp_", "")
-            return await self.edit_instrument_tp(update, context, ticker)
-        
-        # Активация SL/TP для инструмента
-        elif data.startswith("edit_inst_sl_activation_"):
-            ticker = data.replace("edit_inst_sl_activation_", "")
-            return await self.edit_instrument_sl_activation(update, context, ticker)
-        
-        elif data.startswith("disable_inst_sl_activation_"):
-            ticker = data.replace("disable_inst_sl_activation_", "")
-            return await self.disable_instrument_sl_activation(update, context, ticker)
-        
-        elif data.startswith("reset_inst_sl_activation_"):
-            ticker = data.replace("reset_inst_sl_activation_", "")
-            return await self.reset_instrument_sl_activation(update, context, ticker)
-        
-        elif data.startswith("edit_inst_tp_activation_"):
-            ticker = data.replace("edit_inst_tp_activation_", "")
-            return await self.edit_instrument_tp_activation(update, context, ticker)
-        
-        elif data.startswith("disable_inst_tp_activation_"):
-            ticker = data.replace("disable_inst_tp_activation_", "")
-            return await self.disable_instrument_tp_activation(update, context, ticker)
-        
-        elif data.startswith("reset_inst_tp_activation_"):
-            ticker = data.replace("reset_inst_tp_activation_", "")
-            return await self.reset_instrument_tp_activation(update, context, ticker)
-        
-        # Сброс настроек инструмента
-        elif data.startswith("reset_inst_") and not data.startswith("reset_inst_sl_activation_") and not data.startswith("reset_inst_tp_activation_"):
-            ticker = data.replace("reset_inst_", "")
-            return await self.reset_instrument_settings(update, context, ticker)
-        
-        # Удаление инструмента
-        elif data.startswith("delete_inst_"):
-            ticker = data.replace("delete_inst_", "")
-            return await self.delete_instrument(update, context, ticker)
-        
-        # Просмотр всех настроек
-        elif data == "view_all":
-            return await self.view_all_settings(update, context)
-        
         # Закрыть меню
-        elif data == "close":
-            await query.edit_message_text("✅ Меню закрыто")
+        if data == "close":
+            await update.callback_query.edit_message_text("✅ Меню закрыто")
             return ConversationHandler.END
         
+        # Кнопки с параметром: выбирается самый длинный подходящий префикс
+        for prefix in self._PREFIXES:
+            if data.startswith(prefix):
+                method_name, param_kind = self._PREFIX_CALLBACKS[prefix]
+                method = getattr(self, method_name)
+                param = data[len(prefix):]
+                
+                if param_kind == "level":
+                    return await method(update, context, int(param.split("_")[0]))
+                if param_kind == "ticker":
+                    return await method(update, context, param)
+                if param_kind == "multi_tp_ticker":
+                    return await method(update, context, is_global=False, ticker=param)
+                return await method(update, context)
+        
         return MAIN_MENU
     
     # ==================== MULTI-TP ФУНКЦИОНАЛ ====================
@@ -1827,10 +1784,10 @@ class SettingsMenu:
     async def show_multi_tp_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE, is_global: bool = True, ticker: str = None):
         """Показать меню Multi-TP"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1851,7 +1808,7 @@ class SettingsMenu:
             effective = await self.settings_manager.get_effective_settings(active_account.account_id, ticker)
             multi_tp_enabled = effective['multi_tp_enabled']
             multi_tp_levels_json = json.dumps(effective['multi_tp_levels']) if effective['multi_tp_levels'] else None
-            title = f"🎯 MULTI-TP ДЛЯ {ticker}"
+            title = f"🎯 MULTI-TP ДЛЯ {escape(ticker)}"
             back_callback = f"instrument_{ticker}"
             toggle_callback = f"toggle_inst_multi_tp_{ticker}"
             add_callback = f"add_inst_level_{ticker}"
@@ -1922,10 +1879,10 @@ class SettingsMenu:
     async def toggle_multi_tp(self, update: Update, context: ContextTypes.DEFAULT_TYPE, is_global: bool, ticker: str = None):
         """Включить/выключить Multi-TP"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -1959,14 +1916,13 @@ class SettingsMenu:
     async def add_level_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Начать добавление уровня Multi-TP"""
         query = update.callback_query
-        await query.answer()
+        self._answer_in_background(query)
         
         ctx = context.user_data.get('multi_tp_context', {})
         is_global = ctx.get('is_global', True)
         ticker = ctx.get('ticker')
         
-        keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="cancel_add_level")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CANCEL_ADD_LEVEL_MARKUP
         
         text = (
             "➕ <b>Добавить уровень Multi-TP</b>\n\n"
@@ -2002,8 +1958,7 @@ class SettingsMenu:
             context.user_data['new_level_price'] = value
             
             # Запросить объем
-            keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="cancel_add_level")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = CANCEL_ADD_LEVEL_MARKUP
             
             text = (
                 "➕ <b>Добавить уровень Multi-TP</b>\n\n"
@@ -2049,7 +2004,7 @@ class SettingsMenu:
             ticker = ctx.get('ticker')
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -2081,11 +2036,7 @@ class SettingsMenu:
                 )
                 
                 # Вернуться в меню
-                keyboard = [
-                    [InlineKeyboardButton("🎯 Multi-TP", callback_data="show_multi_tp")],
-                    [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                reply_markup = AFTER_MULTI_TP_CHANGE_MARKUP
                 
                 await update.message.reply_text(
                     "⚙️ Выберите действие:",
@@ -2114,11 +2065,7 @@ class SettingsMenu:
             )
             
             # Вернуться в меню
-            keyboard = [
-                [InlineKeyboardButton("🎯 Multi-TP", callback_data="show_multi_tp")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = AFTER_MULTI_TP_CHANGE_MARKUP
             
             await update.message.reply_text(
                 "⚙️ Выберите действие:",
@@ -2138,14 +2085,14 @@ class SettingsMenu:
     async def edit_level_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать меню выбора уровня для редактирования"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         ctx = context.user_data.get('multi_tp_context', {})
         is_global = ctx.get('is_global', True)
         ticker = ctx.get('ticker')
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -2159,7 +2106,7 @@ class SettingsMenu:
             levels = effective['multi_tp_levels'] if effective['multi_tp_levels'] else []
         
         if not levels:
-            await query.answer("❌ Нет уровней для редактирования", show_alert=True)
+            self._answer_in_background(query, "❌ Нет уровней для редактирования", show_alert=True)
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
         # Формирование кнопок
@@ -2193,14 +2140,14 @@ class SettingsMenu:
     async def edit_level_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE, level_index: int):
         """Начать редактирование уровня"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         ctx = context.user_data.get('multi_tp_context', {})
         is_global = ctx.get('is_global', True)
         ticker = ctx.get('ticker')
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -2214,15 +2161,14 @@ class SettingsMenu:
             levels = effective['multi_tp_levels'] if effective['multi_tp_levels'] else []
         
         if level_index >= len(levels):
-            await query.answer("❌ Уровень не найден", show_alert=True)
+            self._answer_in_background(query, "❌ Уровень не найден", show_alert=True)
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
         level = levels[level_index]
         current_price = level.get('level_pct', 0)
         current_volume = level.get('volume_pct', 0)
         
-        keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="cancel_edit_level")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = CANCEL_EDIT_LEVEL_MARKUP
         
         text = (
             f"✏️ <b>Редактирование уровня {level_index + 1}</b>\n\n"
@@ -2266,8 +2212,7 @@ class SettingsMenu:
             level_index = context.user_data.get('editing_level_index', 0)
             
             # Запросить объем
-            keyboard = [[InlineKeyboardButton("❌ Отмена", callback_data="cancel_edit_level")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = CANCEL_EDIT_LEVEL_MARKUP
             
             text = (
                 f"✏️ <b>Редактирование уровня {level_index + 1}</b>\n\n"
@@ -2314,7 +2259,7 @@ class SettingsMenu:
             ticker = ctx.get('ticker')
             
             # Получить активный аккаунт
-            active_account = await self.db.get_active_account()
+            active_account = await self._get_active_account()
             if not active_account:
                 await update.message.reply_text("❌ Активный аккаунт не найден")
                 return ConversationHandler.END
@@ -2349,11 +2294,7 @@ class SettingsMenu:
                 )
                 
                 # Вернуться в меню
-                keyboard = [
-                    [InlineKeyboardButton("🎯 Multi-TP", callback_data="show_multi_tp")],
-                    [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                reply_markup = AFTER_MULTI_TP_CHANGE_MARKUP
                 
                 await update.message.reply_text(
                     "⚙️ Выберите действие:",
@@ -2382,11 +2323,7 @@ class SettingsMenu:
             )
             
             # Вернуться в меню
-            keyboard = [
-                [InlineKeyboardButton("🎯 Multi-TP", callback_data="show_multi_tp")],
-                [InlineKeyboardButton("◀️ Главное меню", callback_data="main_menu")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = AFTER_MULTI_TP_CHANGE_MARKUP
             
             await update.message.reply_text(
                 "⚙️ Выберите действие:",
@@ -2406,14 +2343,14 @@ class SettingsMenu:
     async def delete_level_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показать меню выбора уровня для удаления"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         ctx = context.user_data.get('multi_tp_context', {})
         is_global = ctx.get('is_global', True)
         ticker = ctx.get('ticker')
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -2427,7 +2364,7 @@ class SettingsMenu:
             levels = effective['multi_tp_levels'] if effective['multi_tp_levels'] else []
         
         if not levels:
-            await query.answer("❌ Нет уровней для удаления", show_alert=True)
+            self._answer_in_background(query, "❌ Нет уровней для удаления", show_alert=True)
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
         # Формирование кнопок
@@ -2461,14 +2398,14 @@ class SettingsMenu:
     async def delete_level_confirm(self, update: Update, context: ContextTypes.DEFAULT_TYPE, level_index: int):
         """Подтверждение удаления уровня"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         ctx = context.user_data.get('multi_tp_context', {})
         is_global = ctx.get('is_global', True)
         ticker = ctx.get('ticker')
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -2482,7 +2419,7 @@ class SettingsMenu:
             levels = effective['multi_tp_levels'] if effective['multi_tp_levels'] else []
         
         if level_index >= len(levels):
-            await query.answer("❌ Уровень не найден", show_alert=True)
+            self._answer_in_background(query, "❌ Уровень не найден", show_alert=True)
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
         level = levels[level_index]
@@ -2517,7 +2454,7 @@ class SettingsMenu:
     async def delete_level_execute(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Выполнить удаление уровня"""
         query = update.callback_query
-        await query.answer()
+        # Callback подтверждается уведомлением ниже или в handle_callback_full
         
         level_index = context.user_data.get('deleting_level_index', 0)
         ctx = context.user_data.get('multi_tp_context', {})
@@ -2525,7 +2462,7 @@ class SettingsMenu:
         ticker = ctx.get('ticker')
         
         # Получить активный аккаунт
-        active_account = await self.db.get_active_account()
+        active_account = await self._get_active_account()
         if not active_account:
             await query.edit_message_text("❌ Активный аккаунт не найден")
             return ConversationHandler.END
@@ -2539,7 +2476,7 @@ class SettingsMenu:
             current_levels = effective['multi_tp_levels'] if effective['multi_tp_levels'] else []
         
         if level_index >= len(current_levels):
-            await query.answer("❌ Уровень не найден", show_alert=True)
+            self._answer_in_background(query, "❌ Уровень не найден", show_alert=True)
             return await self.show_multi_tp_menu(update, context, is_global, ticker)
         
         # Удалить уровень
@@ -2558,7 +2495,8 @@ class SettingsMenu:
                 multi_tp_levels=current_levels if current_levels else None
             )
         
-        await query.answer(
+        self._answer_in_background(
+            query,
             f"✅ Уровень {level_index + 1} удален (+{deleted_level['level_pct']}% → {deleted_level['volume_pct']}%)",
             show_alert=True
         )
@@ -2571,6 +2509,7 @@ class SettingsMenu:
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Отмена и выход из меню"""
         if update.callback_query:
+            self._answer_in_background(update.callback_query)
             await update.callback_query.edit_message_text("❌ Операция отменена")
         else:
             await update.message.reply_text("❌ Операция отменена")
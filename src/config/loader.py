@@ -62,5 +62,7 @@ def load_config(
     if config.telegram:
         config.telegram.bot_token = os.getenv(config.telegram.bot_token_env, "")
         config.telegram.chat_id = os.getenv(config.telegram.chat_id_env, "")
+        config.telegram.webhook_url = os.getenv(config.telegram.webhook_url_env, "")
+        config.telegram.webhook_secret = os.getenv(config.telegram.webhook_secret_env, "")
     
     return config, instruments_config
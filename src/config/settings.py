@@ -9,6 +9,12 @@ class TelegramSettings(BaseModel):
     chat_id_env: str = "TELEGRAM_CHAT_ID"
     bot_token: str = ""  # Будет заполнено из переменной окружения
     chat_id: str = ""    # Будет заполнено из переменной окружения
+    webhook_url_env: str = "TELEGRAM_WEBHOOK_URL"
+    webhook_secret_env: str = "TELEGRAM_WEBHOOK_SECRET"
+    webhook_url: str = ""     # Будет заполнено из переменной окружения (пусто - long polling)
+    webhook_secret: str = ""  # Будет заполнено из переменной окружения
+    webhook_listen: str = "0.0.0.0"
+    webhook_port: int = 8443
     notifications: List[str] = Field(
         default_factory=lambda: [
             "trade_executed",
@@ -3,8 +3,9 @@
 Управление глобальными и индивидуальными настройками инструментов
 """
 
+import asyncio
 import json
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from sqlalchemy import select
 
 from src.storage.models import GlobalSettings, InstrumentSettings
@@ -22,14 +23,22 @@ class SettingsManager:
     Приоритет: Настройки инструмента → Глобальные настройки → Defaults
     """
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, cache_global_settings: bool = False):
         """
         Инициализация менеджера настроек
         
         Args:
             database: Экземпляр базы данных
+            cache_global_settings: Кэшировать глобальные настройки в памяти.
+                Кэш обновляется при записи через этот же экземпляр, поэтому
+                включать его можно только там, где настройки изменяются
+                (в меню бота), а не у читателей изменений из других экземпляров
         """
         self.db = database
+        # Кэш глобальных настроек: account_id -> настройки (None - кэш выключен)
+        self._global_cache: Optional[Dict[str, Optional[GlobalSettings]]] = (
+            {} if cache_global_settings else None
+        )
     
     # ==================== ГЛОБАЛЬНЫЕ НАСТРОЙКИ ====================
     
@@ -43,11 +52,18 @@ class SettingsManager:
         Returns:
             GlobalSettings или None если не найдены
         """
+        if self._global_cache is not None and account_id in self._global_cache:
+            return self._global_cache[account_id]
+        
         async with self.db.get_session() as session:
             result = await session.execute(
                 select(GlobalSettings).where(GlobalSettings.account_id == account_id)
             )
-            return result.scalar_one_or_none()
+            settings = result.scalar_one_or_none()
+        
+        if self._global_cache is not None:
+            self._global_cache[account_id] = settings
+        return settings
     
     async def create_global_settings(
         self,
@@ -91,6 +107,9 @@ class SettingsManager:
             await session.commit()
             await session.refresh(settings)
             
+            if self._global_cache is not None:
+                self._global_cache[account_id] = settings
+            
             logger.info(f"Созданы глобальные настройки для аккаунта {account_id}")
             return settings
     
@@ -129,6 +148,9 @@ class SettingsManager:
             await session.commit()
             await session.refresh(settings)
             
+            if self._global_cache is not None:
+                self._global_cache[account_id] = settings
+            
             logger.info(f"Обновлены глобальные настройки для аккаунта {account_id}: {kwargs}")
             return settings
     
@@ -313,6 +335,51 @@ class SettingsManager:
         # Получить глобальные настройки
         global_settings = await self.get_global_settings(account_id)
         
+        return self._merge_effective_settings(ticker, instrument_settings, global_settings)
+    
+    async def get_effective_and_instrument(
+        self,
+        account_id: str,
+        ticker: str
+    ) -> Tuple[Dict[str, Any], Optional[InstrumentSettings]]:
+        """
+        Получить эффективные настройки вместе с записью инструмента
+        
+        Запись инструмента читается один раз и используется как для слияния,
+        так и для отображения источника значений (свои/глобальные).
+        
+        Args:
+            account_id: ID аккаунта
+            ticker: Тикер инструмента
+            
+        Returns:
+            Кортеж (эффективные настройки, настройки инструмента или None)
+        """
+        instrument_settings, global_settings = await asyncio.gather(
+            self.get_instrument_settings(account_id, ticker),
+            self.get_global_settings(account_id)
+        )
+        
+        effective = self._merge_effective_settings(ticker, instrument_settings, global_settings)
+        return effective, instrument_settings
+    
+    def _merge_effective_settings(
+        self,
+        ticker: str,
+        instrument_settings: Optional[InstrumentSettings],
+        global_settings: Optional[GlobalSettings]
+    ) -> Dict[str, Any]:
+        """
+        Слить настройки инструмента, глобальные настройки и defaults
+        
+        Args:
+            ticker: Тикер инструмента
+            instrument_settings: Настройки инструмента или None
+            global_settings: Глобальные настройки или None
+            
+        Returns:
+            Словарь с эффективными настройками
+        """
         # Defaults
         defaults = {
             'stop_loss_pct': 0.4,
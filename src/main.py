@@ -77,6 +77,7 @@ class AutoStopSystem:
             
             # Настройка логирования
             setup_logger(self.config.logging)
+            logger.info("Event loop: {}", type(asyncio.get_running_loop()).__module__)
             
             # Инициализация базы данных
             self.database = Database()
@@ -160,7 +161,11 @@ class AutoStopSystem:
                     api_client=self.api_client,
                     operations_cache=self.operations_cache,
                     statistics_calculator=self.statistics_calculator,
-                    report_formatter=self.report_formatter
+                    report_formatter=self.report_formatter,
+                    webhook_url=self.config.telegram.webhook_url or None,
+                    webhook_secret=self.config.telegram.webhook_secret or None,
+                    webhook_listen=self.config.telegram.webhook_listen,
+                    webhook_port=self.config.telegram.webhook_port
                 )
                 await self.telegram_bot.start()
             
@@ -348,9 +353,9 @@ class AutoStopSystem:
             
             logger.info(f"✅ Переподключение завершено. Активный аккаунт: {active_account.name}")
             
-            # Отправить уведомление в Telegram
+            # Отправить уведомление в Telegram сразу: это ответ на /switch_account
             if self.telegram_bot:
-                await self.telegram_bot.send_message(
+                await self.telegram_bot.send_message_now(
                     f"✅ Переключение на аккаунт <b>{active_account.name}</b> завершено!\n"
                     f"🆔 Account ID: <code>{active_account.account_id}</code>"
                 )
@@ -362,7 +367,7 @@ class AutoStopSystem:
             
             # Отправить уведомление об ошибке
             if self.telegram_bot:
-                await self.telegram_bot.send_message(
+                await self.telegram_bot.send_message_now(
                     f"❌ Ошибка при переподключении: {str(e)}"
                 )
             
@@ -442,6 +447,25 @@ class AutoStopSystem:
             self._shutdown_event.set()
 
 
+def install_uvloop() -> bool:
+    """
+    Установка uvloop в качестве реализации event loop
+    
+    uvloop - необязательная зависимость: если пакет не установлен,
+    используется стандартный asyncio event loop.
+    
+    Returns:
+        bool: True, если uvloop установлен
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
 async def main():
     """
     Точка входа в приложение
@@ -468,4 +492,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
@@ -2,13 +2,15 @@ import os
 import json
 import sqlite3
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Type, TypeVar
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple, Type, TypeVar
 import asyncio
+import time
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.future import select
-from sqlalchemy import update, delete
+from sqlalchemy import event, update, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from src.storage.models import Base, Position, Order, Trade, MultiTakeProfitLevel, SystemEvent, Setting, Account
 from src.utils.logger import get_logger
@@ -18,6 +20,9 @@ logger = get_logger("storage.database")
 
 T = TypeVar('T')
 
+# Порог (в секундах), после которого запрос считается медленным
+SLOW_QUERY_THRESHOLD = 0.05
+
 
 class Database:
     """
@@ -55,8 +60,37 @@ class Database:
         # Блокировка для синхронизации доступа к базе данных
         self._lock = asyncio.Lock()
         
+        # Режим WAL для каждого нового соединения
+        event.listen(self.engine.sync_engine, "connect", self._on_connect)
+        
+        # Мониторинг медленных запросов
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        
         logger.info(f"База данных инициализирована: {db_path}")
     
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        """
+        Включает журнал WAL: команды бота обрабатываются параллельно, и в этом
+        режиме чтение не блокируется записью (и наоборот)
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+    
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        """Запоминает время начала выполнения запроса"""
+        conn.info.setdefault("query_start_time", []).append(time.monotonic())
+    
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        """Логирует запросы, выполнявшиеся дольше SLOW_QUERY_THRESHOLD"""
+        elapsed = time.monotonic() - conn.info["query_start_time"].pop()
+        if elapsed > SLOW_QUERY_THRESHOLD:
+            logger.warning("Медленный запрос ({:.3f} сек): {}", elapsed, statement[:200])
+    
     async def create_tables(self):
         """
         Создание таблиц в базе данных
@@ -369,18 +403,62 @@ class Database:
     
     # Методы для Telegram Bot
     
-    async def get_open_positions(self) -> List[Position]:
+    async def get_open_positions(self, limit: Optional[int] = None) -> List[Position]:
         """
-        Получение всех открытых позиций
+        Получение открытых позиций
         
+        Args:
+            limit: Максимальное количество позиций (None - все позиции)
+            
         Returns:
             List[Position]: Список открытых позиций
         """
         async with self.get_session() as session:
             stmt = select(Position).where(Position.quantity > 0)
+            if limit is not None:
+                stmt = stmt.order_by(Position.ticker, Position.id).limit(limit)
             result = await session.execute(stmt)
             return result.scalars().all()
     
+    async def count_open_positions(self) -> int:
+        """
+        Получение количества открытых позиций
+        
+        Returns:
+            int: Количество открытых позиций
+        """
+        async with self.get_session() as session:
+            stmt = select(func.count()).select_from(Position).where(Position.quantity > 0)
+            result = await session.execute(stmt)
+            return result.scalar_one()
+    
+    async def get_open_positions_page(self, limit: int) -> Tuple[List[Position], int]:
+        """
+        Получение первых открытых позиций и их общего количества
+        
+        Оба запроса выполняются в одной сессии (одно соединение из пула).
+        
+        Args:
+            limit: Максимальное количество позиций
+            
+        Returns:
+            Tuple[List[Position], int]: Список позиций и общее количество открытых позиций
+        """
+        async with self.get_session() as session:
+            count_stmt = select(func.count()).select_from(Position).where(Position.quantity > 0)
+            total = (await session.execute(count_stmt)).scalar_one()
+            if not total:
+                return [], 0
+            
+            stmt = (
+                select(Position)
+                .where(Position.quantity > 0)
+                .order_by(Position.ticker, Position.id)
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().all(), total
+    
     async def get_total_trades_count(self) -> int:
         """
         Получение общего количества сделок
@@ -389,9 +467,9 @@ class Database:
             int: Количество сделок
         """
         async with self.get_session() as session:
-            stmt = select(Trade)
+            stmt = select(func.count()).select_from(Trade)
             result = await session.execute(stmt)
-            return len(result.scalars().all())
+            return result.scalar_one()
     
     async def get_recent_events(self, limit: int = 10) -> List[SystemEvent]:
         """
@@ -410,6 +488,35 @@ class Database:
             result = await session.execute(stmt)
             return result.scalars().all()
     
+    async def get_recent_events_brief(
+        self,
+        limit: int = 10,
+        description_length: int = 100
+    ) -> List[Tuple[str, datetime, Optional[str]]]:
+        """
+        Получение последних системных событий в кратком виде
+        
+        Выбираются только нужные для вывода колонки, а описание обрезается
+        на стороне SQLite, поэтому длинные описания и детали не загружаются.
+        
+        Args:
+            limit: Максимальное количество событий
+            description_length: Максимальная длина описания
+            
+        Returns:
+            List[Tuple[str, datetime, Optional[str]]]: Тип, время и описание событий
+        """
+        async with self.get_session() as session:
+            stmt = select(
+                SystemEvent.event_type,
+                SystemEvent.created_at,
+                func.substr(SystemEvent.description, 1, description_length)
+            ).order_by(
+                SystemEvent.created_at.desc()
+            ).limit(limit)
+            result = await session.execute(stmt)
+            return [tuple(row) for row in result.all()]
+    
     # Методы для работы с настройками
     
     async def get_setting(self, key: str) -> Optional[str]:
@@ -428,38 +535,50 @@ class Database:
             setting = result.scalar_one_or_none()
             return setting.value if setting else None
     
-    async def set_setting(self, key: str, value: str, description: Optional[str] = None):
+    async def set_setting(self, key: str, value: str, description: Optional[str] = None) -> bool:
         """
         Установка значения настройки
         
+        Выполняется одним запросом INSERT ... ON CONFLICT DO UPDATE.
+        Если значение не изменилось, запись не обновляется.
+        
         Args:
             key: Ключ настройки
             value: Значение настройки
             description: Описание настройки
+            
+        Returns:
+            bool: True, если настройка создана или изменена
         """
+        stmt = sqlite_insert(Setting).values(
+            key=key,
+            value=value,
+            description=description
+        )
+        
+        # Для существующей настройки обновляем значение (и описание, если задано)
+        update_values = {
+            "value": stmt.excluded.value,
+            "updated_at": datetime.utcnow()
+        }
+        if description:
+            update_values["description"] = stmt.excluded.description
+        
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Setting.key],
+            set_=update_values,
+            where=Setting.value.is_distinct_from(stmt.excluded.value)
+        )
+        
         async with self._lock:
             async with self.get_session() as session:
-                # Проверяем, существует ли настройка
-                stmt = select(Setting).where(Setting.key == key)
                 result = await session.execute(stmt)
-                setting = result.scalar_one_or_none()
-                
-                if setting:
-                    # Обновляем существующую настройку
-                    setting.value = value
-                    if description:
-                        setting.description = description
-                else:
-                    # Создаем новую настройку
-                    setting = Setting(
-                        key=key,
-                        value=value,
-                        description=description
-                    )
-                    session.add(setting)
-                
                 await session.commit()
-                logger.info(f"Настройка {key} обновлена")
+        
+        changed = result.rowcount > 0
+        if changed:
+            logger.info(f"Настройка {key} обновлена")
+        return changed
     
     # Методы для работы с аккаунтами
     
@@ -475,6 +594,40 @@ class Database:
             result = await session.execute(stmt)
             return result.scalars().all()
     
+    async def iter_accounts(self, limit: int = 20, offset: int = 0) -> AsyncIterator[Account]:
+        """
+        Постраничный обход аккаунтов
+        
+        Строки читаются из курсора по мере итерации, без загрузки
+        всей выборки в память.
+        
+        Args:
+            limit: Максимальное количество аккаунтов на странице
+            offset: Смещение от начала списка
+            
+        Yields:
+            Account: Аккаунты в порядке создания
+        """
+        async with self.get_session() as session:
+            stmt = select(Account).order_by(
+                Account.created_at, Account.id
+            ).limit(limit).offset(offset)
+            result = await session.stream_scalars(stmt)
+            async for account in result:
+                yield account
+    
+    async def count_accounts(self) -> int:
+        """
+        Получение количества аккаунтов
+        
+        Returns:
+            int: Количество аккаунтов
+        """
+        async with self.get_session() as session:
+            stmt = select(func.count()).select_from(Account)
+            result = await session.execute(stmt)
+            return result.scalar_one()
+    
     async def get_active_account(self) -> Optional[Account]:
         """
         Получение активного аккаунта
@@ -560,25 +713,28 @@ class Database:
         """
         async with self._lock:
             async with self.get_session() as session:
-                # Получаем аккаунт
-                stmt = select(Account).where(Account.name == name)
-                result = await session.execute(stmt)
-                account = result.scalar_one_or_none()
+                # Удаляем неактивный аккаунт одним запросом, без загрузки строки
+                result = await session.execute(
+                    delete(Account).where(
+                        Account.name == name,
+                        Account.is_active.isnot(True)
+                    )
+                )
+                await session.commit()
                 
-                if not account:
+                if result.rowcount > 0:
+                    logger.info(f"Аккаунт '{name}' удален")
+                    return True
+                
+                # Ничего не удалено: аккаунт не найден или он активный
+                is_active = await session.scalar(
+                    select(Account.is_active).where(Account.name == name)
+                )
+                if is_active is None:
                     logger.warning(f"Аккаунт '{name}' не найден")
                     return False
                 
-                # Проверяем, не активный ли это аккаунт
-                if account.is_active:
-                    raise ValueError(f"Нельзя удалить активный аккаунт '{name}'. Сначала переключитесь на другой аккаунт.")
-                
-                # Удаляем аккаунт
-                await session.delete(account)
-                await session.commit()
-                
-                logger.info(f"Аккаунт '{name}' удален")
-                return True
+                raise ValueError(f"Нельзя удалить активный аккаунт '{name}'. Сначала переключитесь на другой аккаунт.")
     
     async def switch_account(self, name: str) -> bool:
         """
@@ -641,6 +797,7 @@ class Database:
         
         Автоматически проверяет и применяет миграции при запуске приложения.
         Текущие миграции:
+        - Создание индекса system_events.created_at
         - Добавление полей sl_activation_pct и tp_activation_pct в таблицы global_settings и instrument_settings
         
         Returns:
@@ -656,6 +813,14 @@ class Database:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
             
+            # Индекс для выборки последних событий (/logs); для новых БД он
+            # создается вместе с таблицей, для существующих - здесь
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS ix_system_events_created_at "
+                "ON system_events (created_at)"
+            )
+            conn.commit()
+            
             # Проверка существования колонок
             cursor.execute("PRAGMA table_info(global_settings)")
             global_columns = [col[1] for col in cursor.fetchall()]
@@ -133,7 +133,7 @@ class SystemEvent(Base):
     ticker = Column(String(50), nullable=True, index=True)
     description = Column(Text, nullable=True)
     details = Column(Text, nullable=True)  # JSON с деталями события
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
         return f"<SystemEvent(type={self.event_type}, ticker={self.ticker}, created_at={self.created_at})>"
@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+import os
+import tempfile
+
+from src.storage.database import Database
+
+
+class TestDatabase(unittest.TestCase):
+    """
+    Тесты для Database (настройки и аккаунты)
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных во временном каталоге
+        """
+        self.loop = asyncio.new_event_loop()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, "test.db"))
+        self._run(self.db.create_tables())
+
+    def tearDown(self):
+        """
+        Закрытие соединений и удаление временного каталога
+        """
+        self._run(self.db.engine.dispose())
+        self.loop.close()
+        self.tmp_dir.cleanup()
+
+    def _run(self, coro):
+        """
+        Выполнение корутины в цикле событий теста
+        """
+        return self.loop.run_until_complete(coro)
+
+    def test_set_setting_reports_changes(self):
+        """
+        set_setting возвращает True только при создании или изменении значения
+        """
+        async def scenario():
+            created = await self.db.set_setting("token", "a")
+            unchanged = await self.db.set_setting("token", "a")
+            changed = await self.db.set_setting("token", "b")
+            value = await self.db.get_setting("token")
+            return created, unchanged, changed, value
+
+        created, unchanged, changed, value = self._run(scenario())
+
+        self.assertTrue(created)
+        self.assertFalse(unchanged)
+        self.assertTrue(changed)
+        self.assertEqual(value, "b")
+
+    def test_remove_missing_account(self):
+        """
+        Удаление несуществующего аккаунта возвращает False
+        """
+        self.assertFalse(self._run(self.db.remove_account("missing")))
+
+    def test_remove_active_account(self):
+        """
+        Удаление активного аккаунта запрещено, аккаунт остается в базе
+        """
+        async def scenario():
+            await self.db.add_account("main", "token", "acc-1")
+            await self.db.switch_account("main")
+            with self.assertRaises(ValueError):
+                await self.db.remove_account("main")
+            return await self.db.get_account_by_name("main")
+
+        self.assertIsNotNone(self._run(scenario()))
+
+    def test_remove_inactive_account(self):
+        """
+        Неактивный аккаунт удаляется
+        """
+        async def scenario():
+            await self.db.add_account("main", "token", "acc-1")
+            await self.db.add_account("spare", "token", "acc-2")
+            await self.db.switch_account("main")
+            removed = await self.db.remove_account("spare")
+            return removed, await self.db.get_account_by_name("spare")
+
+        removed, account = self._run(scenario())
+
+        self.assertTrue(removed)
+        self.assertIsNone(account)
+
+
+if __name__ == "__main__":
+    unittest.main()
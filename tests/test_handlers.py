@@ -0,0 +1,395 @@
+import unittest
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from telegram.error import TelegramError
+
+from src.bot.bot import TelegramBot
+from src.bot.handlers.base import BaseHandler, UserError, safe_handler
+from src.bot.handlers.statistics import MAX_MESSAGE_LENGTH
+
+
+class MockMessage:
+    """
+    Мок для Message: запоминает ответы и изменения текста
+    """
+
+    def __init__(self):
+        self.replies = []
+        self.edits = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+        return self
+
+    async def edit_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+def make_handler() -> BaseHandler:
+    """
+    Обработчик бота без подключения к Telegram и компонентов системы
+    """
+    bot = TelegramBot(
+        token="token",
+        chat_id="1",
+        database=None,
+        position_manager=None
+    )
+    return BaseHandler(bot)
+
+
+class TestSafeHandler(unittest.TestCase):
+    """
+    Тесты для декоратора safe_handler
+    """
+
+    def setUp(self):
+        """
+        Создание цикла событий и обновления с моком сообщения
+        """
+        self.loop = asyncio.new_event_loop()
+        self.message = MockMessage()
+        self.update = SimpleNamespace(message=self.message)
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _call(self, error):
+        """
+        Вызов обработчика, выбрасывающего error
+        """
+        @safe_handler
+        async def handler(self, update, context):
+            if error:
+                raise error
+            return "ok"
+
+        return self.loop.run_until_complete(handler(None, self.update, None))
+
+    def test_result_is_returned(self):
+        """
+        Без ошибок результат обработчика возвращается, ответа нет
+        """
+        self.assertEqual(self._call(None), "ok")
+        self.assertEqual(self.message.replies, [])
+
+    def test_user_error_is_shown_as_is(self):
+        """
+        Текст UserError отправляется пользователю как есть
+        """
+        self._call(UserError("Аккаунт не найден"))
+
+        self.assertEqual(self.message.replies, ["❌ Аккаунт не найден"])
+
+    def test_value_error_is_reported(self):
+        """
+        ValueError не считается ошибкой пользователя и логируется
+        """
+        with patch("src.bot.handlers.base.logger") as log:
+            self._call(ValueError("invalid literal"))
+
+        log.exception.assert_called_once()
+        self.assertEqual(self.message.replies, ["❌ Ошибка: invalid literal"])
+
+    def test_other_errors_are_reported(self):
+        """
+        Остальные исключения сообщаются как ошибка
+        """
+        self._call(RuntimeError("boom"))
+
+        self.assertEqual(self.message.replies, ["❌ Ошибка: boom"])
+
+
+class TestDeleteMessage(unittest.TestCase):
+    """
+    Тесты для BaseHandler._delete_message
+    """
+
+    def setUp(self):
+        """
+        Создание обработчика
+        """
+        self.loop = asyncio.new_event_loop()
+        self.handler = make_handler()
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def test_error_is_logged_and_ignored(self):
+        """
+        Ошибка удаления не пробрасывается и логируется на уровне DEBUG
+        """
+        async def delete():
+            raise TelegramError("Message to delete not found")
+
+        update = SimpleNamespace(message=SimpleNamespace(delete=delete))
+
+        with patch("src.bot.handlers.base.logger") as log:
+            self.loop.run_until_complete(self.handler._delete_message(update))
+
+        log.debug.assert_called_once()
+
+
+class MockAccountsDatabase:
+    """
+    Мок для Database: активный аккаунт удалить нельзя
+    """
+
+    async def remove_account(self, name: str) -> bool:
+        raise ValueError(f"Нельзя удалить активный аккаунт '{name}'")
+
+
+class TestRemoveAccount(unittest.TestCase):
+    """
+    Тесты для AccountsHandler.cmd_remove_account
+    """
+
+    def setUp(self):
+        """
+        Создание обработчика аккаунтов с моком базы данных
+        """
+        self.loop = asyncio.new_event_loop()
+        bot = TelegramBot(
+            token="token",
+            chat_id="1",
+            database=MockAccountsDatabase(),
+            position_manager=None
+        )
+        self.handler = bot.accounts_handler
+        self.message = MockMessage()
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def test_active_account_is_user_error(self):
+        """
+        Отказ БД в удалении активного аккаунта показывается как ошибка пользователя
+        """
+        update = SimpleNamespace(message=self.message)
+        context = SimpleNamespace(args=["main"])
+
+        self.loop.run_until_complete(self.handler.cmd_remove_account(update, context))
+
+        self.assertEqual(self.message.replies, ["❌ Нельзя удалить активный аккаунт 'main'"])
+
+
+@patch("src.bot.handlers.base.PLACEHOLDER_DELAY", 0.01)
+class TestAwaitWithPlaceholder(unittest.TestCase):
+    """
+    Тесты для BaseHandler._await_with_placeholder
+    """
+
+    def setUp(self):
+        """
+        Создание обработчика и обновления с моком сообщения
+        """
+        self.loop = asyncio.new_event_loop()
+        self.handler = make_handler()
+        self.message = MockMessage()
+        self.update = SimpleNamespace(message=self.message)
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _await(self, delay: float):
+        """
+        Ожидание запроса, выполняющегося delay секунд
+        """
+        async def query():
+            await asyncio.sleep(delay)
+            return "result"
+
+        return self.loop.run_until_complete(
+            self.handler._await_with_placeholder(self.update, query(), "⏳")
+        )
+
+    def test_fast_query_without_placeholder(self):
+        """
+        Быстрый запрос: заглушка не отправляется, ответ - новое сообщение
+        """
+        result, reply, placeholder_sent = self._await(0)
+
+        self.assertEqual(result, "result")
+        self.assertEqual(self.message.replies, [])
+        self.assertEqual(reply, self.message.reply_text)
+        self.assertFalse(placeholder_sent)
+
+    def test_slow_query_edits_placeholder(self):
+        """
+        Медленный запрос: отправляется заглушка, ответ заменяет ее текст
+        """
+        result, reply, placeholder_sent = self._await(0.05)
+
+        self.assertEqual(result, "result")
+        self.assertEqual(self.message.replies, ["⏳"])
+        self.assertEqual(reply, self.message.edit_text)
+        self.assertTrue(placeholder_sent)
+
+    def test_failed_placeholder_cancels_query(self):
+        """
+        Ошибка отправки заглушки пробрасывается, а запрос отменяется
+        """
+        cancelled = []
+
+        async def query():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def failing_reply(text, **kwargs):
+            raise RuntimeError("network")
+
+        self.update = SimpleNamespace(message=SimpleNamespace(reply_text=failing_reply))
+
+        async def scenario():
+            with self.assertRaises(RuntimeError):
+                await self.handler._await_with_placeholder(self.update, query(), "⏳")
+            # Дать отмененному запросу завершиться
+            await asyncio.sleep(0)
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(cancelled, [True])
+
+
+class TestSendReport(unittest.TestCase):
+    """
+    Тесты для StatisticsHandler._send_report
+    """
+
+    def setUp(self):
+        """
+        Создание обработчика статистики и журнала отправленных частей
+        """
+        self.loop = asyncio.new_event_loop()
+        bot = TelegramBot(
+            token="token",
+            chat_id="1",
+            database=None,
+            position_manager=None
+        )
+        self.handler = bot.statistics_handler
+        self.sent = []
+
+        async def reply_text(text, **kwargs):
+            self.sent.append(text[0])
+
+        self.update = SimpleNamespace(message=SimpleNamespace(reply_text=reply_text))
+        self.report = "".join(
+            letter * MAX_MESSAGE_LENGTH for letter in ("a", "b", "c")
+        )
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def test_new_message_is_sent_first(self):
+        """
+        Без заглушки первая часть отправляется раньше остальных,
+        даже если ее отправка медленнее
+        """
+        async def slow_reply(text, **kwargs):
+            await asyncio.sleep(0.01)
+            self.sent.append(text[0])
+
+        self.loop.run_until_complete(self.handler._send_report(
+            self.update, slow_reply, self.report, edits_placeholder=False
+        ))
+
+        self.assertEqual(self.sent, ["a", "b", "c"])
+
+    def test_remaining_parts_keep_order(self):
+        """
+        При редактировании заглушки остальные части отправляются по порядку
+        """
+        async def edit_text(text, **kwargs):
+            self.sent.append(text[0])
+
+        self.loop.run_until_complete(self.handler._send_report(
+            self.update, edit_text, self.report
+        ))
+
+        self.assertEqual(sorted(self.sent), ["a", "b", "c"])
+        self.assertEqual([part for part in self.sent if part != "a"], ["b", "c"])
+
+
+class TestStatsReply(unittest.TestCase):
+    """
+    Тесты для выбора способа отправки отчета в StatisticsHandler.cmd_stats
+    """
+
+    def setUp(self):
+        """
+        Создание обработчика статистики с моками аналитики
+        """
+        self.loop = asyncio.new_event_loop()
+        bot = TelegramBot(
+            token="token",
+            chat_id="1",
+            database=None,
+            position_manager=None,
+            operations_cache=object(),
+            statistics_calculator=object(),
+            report_formatter=object()
+        )
+        self.handler = bot.statistics_handler
+        self.reports = []
+
+        async def get_active_account():
+            return SimpleNamespace(account_id="acc")
+
+        async def send_report(update, reply, report, edits_placeholder=True):
+            self.reports.append((report, edits_placeholder))
+
+        self.handler._get_active_account = get_active_account
+        self.handler._send_report = send_report
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _stats(self, placeholder_sent: bool):
+        """
+        Вызов /stats, когда отчет получен с заглушкой или без нее
+        """
+        async def await_with_placeholder(update, awaitable, placeholder_text):
+            awaitable.close()
+            return "report", update.message.reply_text, placeholder_sent
+
+        self.handler._await_with_placeholder = await_with_placeholder
+        update = SimpleNamespace(message=MockMessage())
+        context = SimpleNamespace(args=[])
+        self.loop.run_until_complete(self.handler.cmd_stats(update, context))
+
+    def test_flag_is_passed_to_send_report(self):
+        """
+        Признак отправленной заглушки передается в _send_report
+        """
+        self._stats(placeholder_sent=False)
+        self._stats(placeholder_sent=True)
+
+        self.assertEqual(self.reports, [("report", False), ("report", True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from src.analytics.operations_cache import OperationsCache
+from src.storage.database import Database
+from src.storage.models import OperationCache
+
+
+def make_operation(operation_id: str, ticker: str, date: datetime) -> dict:
+    """
+    Операция в формате OperationsFetcher
+    """
+    return {
+        'operation_id': operation_id,
+        'date': date,
+        'type': 'BUY',
+        'state': 'EXECUTED',
+        'ticker': ticker,
+        'figi': f"figi_{ticker}",
+        'quantity': 1,
+        'price': 100.0,
+        'payment': -100.0,
+    }
+
+
+class MockOperationsFetcher:
+    """
+    Мок для OperationsFetcher: возвращает операции, попадающие в период
+    """
+
+    def __init__(self, operations):
+        self.operations = operations
+
+    async def fetch_operations(self, account_id: str, from_date: datetime, to_date: datetime):
+        return [op for op in self.operations if from_date <= op['date'] <= to_date]
+
+
+class TestOperationsCache(unittest.TestCase):
+    """
+    Тесты для OperationsCache
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных во временном каталоге и набора операций
+        """
+        self.loop = asyncio.new_event_loop()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, "test.db"))
+        self._run(self.db.create_tables())
+
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.from_date = today - timedelta(days=5)
+        self.operations = [
+            make_operation("hist_sber", "SBER", today - timedelta(days=2, hours=-12)),
+            make_operation("hist_gazp", "GAZP", today - timedelta(days=2, hours=-13)),
+            make_operation("today_sber", "SBER", today),
+            make_operation("today_gazp", "GAZP", today),
+        ]
+        self.cache = OperationsCache(self.db, MockOperationsFetcher(self.operations))
+
+    def tearDown(self):
+        """
+        Закрытие соединений и удаление временного каталога
+        """
+        self._run(self.db.engine.dispose())
+        self.loop.close()
+        self.tmp_dir.cleanup()
+
+    def _run(self, coro):
+        """
+        Выполнение корутины в цикле событий теста
+        """
+        return self.loop.run_until_complete(coro)
+
+    def _get_operations(self, ticker=None):
+        return self._run(self.cache.get_operations(
+            account_id="acc",
+            from_date=self.from_date,
+            to_date=datetime.now(timezone.utc),
+            ticker=ticker
+        ))
+
+    def test_ticker_filter_without_cache(self):
+        """
+        Первый запрос: фильтр по тикеру применяется к операциям из API,
+        а в кэш попадают операции по всем инструментам
+        """
+        operations = self._get_operations(ticker="SBER")
+
+        self.assertEqual(
+            sorted(op.operation_id for op in operations),
+            ["hist_sber", "today_sber"]
+        )
+        self.assertTrue(all(isinstance(op, OperationCache) for op in operations))
+
+        cached = self._run(self.cache._get_cached_operations(
+            "acc", self.from_date, datetime.now(timezone.utc)
+        ))
+        self.assertEqual(len(cached), 2)
+
+    def test_ticker_filter_with_cache(self):
+        """
+        Повторный запрос: фильтр по тикеру применяется к кэшу в SQL
+        """
+        self._get_operations()
+        operations = self._get_operations(ticker="GAZP")
+
+        self.assertEqual(
+            sorted(op.operation_id for op in operations),
+            ["hist_gazp", "today_gazp"]
+        )
+
+    def test_ticker_filter_on_gap_and_today(self):
+        """
+        Запрос с пропущенными днями: фильтр по тикеру применяется к операциям
+        из кэша, за пропущенные дни и за сегодня, а кэш пополняется всеми
+        """
+        old_date = self.from_date + timedelta(hours=12)
+        self._run(self.cache._cache_operations("acc", [
+            make_operation("old_sber", "SBER", old_date),
+            make_operation("old_gazp", "GAZP", old_date),
+        ]))
+
+        operations = self._get_operations(ticker="SBER")
+
+        self.assertEqual(
+            sorted(op.operation_id for op in operations),
+            ["hist_sber", "old_sber", "today_sber"]
+        )
+
+        cached = self._run(self.cache._get_cached_operations(
+            "acc", self.from_date, datetime.now(timezone.utc)
+        ))
+        self.assertEqual(len(cached), 4)
+
+    def test_without_ticker_returns_all(self):
+        """
+        Без тикера возвращаются операции по всем инструментам
+        """
+        self.assertEqual(len(self._get_operations()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import asyncio
+import os
+import tempfile
+
+from src.config.settings_manager import SettingsManager
+from src.storage.database import Database
+
+
+class TestGlobalSettingsCache(unittest.TestCase):
+    """
+    Тесты для кэша глобальных настроек SettingsManager
+    """
+
+    def setUp(self):
+        """
+        Создание базы данных во временном каталоге и двух менеджеров:
+        с кэшем (как у бота) и без него (как у торговой системы)
+        """
+        self.loop = asyncio.new_event_loop()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp_dir.name, "test.db"))
+        self._run(self.db.create_tables())
+        self.cached = SettingsManager(self.db, cache_global_settings=True)
+        self.reader = SettingsManager(self.db)
+
+    def tearDown(self):
+        """
+        Закрытие соединений и удаление временного каталога
+        """
+        self._run(self.db.engine.dispose())
+        self.loop.close()
+        self.tmp_dir.cleanup()
+
+    def _run(self, coro):
+        """
+        Выполнение корутины в цикле событий теста
+        """
+        return self.loop.run_until_complete(coro)
+
+    def test_missing_row_is_cached(self):
+        """
+        Отсутствие настроек кэшируется: запись в обход кэша не видна
+        """
+        async def scenario():
+            first = await self.cached.get_global_settings("acc")
+            await self.reader.create_global_settings("acc")
+            second = await self.cached.get_global_settings("acc")
+            return first, second
+
+        first, second = self._run(scenario())
+
+        self.assertIsNone(first)
+        self.assertIsNone(second)
+
+    def test_writes_go_through_cache(self):
+        """
+        Создание и изменение через кэширующий менеджер сразу видны в кэше
+        и в базе данных
+        """
+        async def scenario():
+            await self.cached.get_global_settings("acc")
+            await self.cached.create_global_settings("acc", stop_loss_pct=0.5)
+            created = await self.cached.get_global_settings("acc")
+            await self.cached.update_global_settings("acc", stop_loss_pct=0.7)
+            updated = await self.cached.get_global_settings("acc")
+            stored = await self.reader.get_global_settings("acc")
+            return created, updated, stored
+
+        created, updated, stored = self._run(scenario())
+
+        self.assertEqual(created.stop_loss_pct, 0.5)
+        self.assertEqual(updated.stop_loss_pct, 0.7)
+        self.assertEqual(stored.stop_loss_pct, 0.7)
+
+    def test_reader_without_cache_sees_changes(self):
+        """
+        Менеджер без кэша читает изменения других экземпляров из базы данных
+        """
+        async def scenario():
+            await self.reader.get_global_settings("acc")
+            await self.cached.update_global_settings("acc", take_profit_pct=2.0)
+            return await self.reader.get_global_settings("acc")
+
+        settings = self._run(scenario())
+
+        self.assertEqual(settings.take_profit_pct, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
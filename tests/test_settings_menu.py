@@ -0,0 +1,239 @@
+import unittest
+import asyncio
+from types import SimpleNamespace
+
+from src.bot.settings_menu import SettingsMenu, MAIN_MENU, ADD_INSTRUMENT
+
+
+class MockCallbackQuery:
+    """
+    Мок для CallbackQuery: запоминает ответы и изменения сообщения
+    """
+
+    def __init__(self, data: str):
+        self.id = data
+        self.data = data
+        self.answers = []
+        self.edits = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+    async def edit_message_text(self, *args, **kwargs):
+        self.edits.append((args, kwargs))
+
+
+class MockDatabase:
+    """
+    Мок для Database с активным аккаунтом
+    """
+
+    async def get_active_account(self):
+        return SimpleNamespace(account_id="acc")
+
+
+class MockSettingsManager:
+    """
+    Мок для SettingsManager: инструмент без индивидуальных настроек
+    """
+
+    def __init__(self):
+        self.created = []
+
+    async def get_instrument_settings(self, account_id, ticker):
+        return None
+
+    async def create_instrument_settings(self, account_id, ticker):
+        self.created.append(ticker)
+
+    async def update_instrument_settings(self, *args, **kwargs):
+        return None
+
+    async def delete_instrument_settings(self, account_id, ticker):
+        return True
+
+    async def get_all_instruments(self, account_id):
+        return []
+
+    async def get_effective_and_instrument(self, account_id, ticker):
+        effective = {
+            'stop_loss_pct': 0.4,
+            'take_profit_pct': 1.0,
+            'sl_activation_pct': None,
+            'tp_activation_pct': None,
+            'multi_tp_enabled': False,
+        }
+        return effective, None
+
+
+class TestSettingsMenuRouting(unittest.TestCase):
+    """
+    Тесты маршрутизации callback кнопок в SettingsMenu.handle_callback_full
+    """
+
+    def setUp(self):
+        """
+        Создание меню с моками вместо обработчиков
+        """
+        self.loop = asyncio.new_event_loop()
+        self.menu = SettingsMenu(MockSettingsManager(), MockDatabase(), "1")
+        self.calls = []
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _record(self, name):
+        async def handler(update, context, *args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return MAIN_MENU
+        setattr(self.menu, name, handler)
+
+    def _press(self, data: str, user_data=None):
+        query = MockCallbackQuery(data)
+        update = SimpleNamespace(callback_query=query)
+        context = SimpleNamespace(user_data=user_data or {})
+
+        async def scenario():
+            result = await self.menu.handle_callback_full(update, context)
+            # Дать фоновым ответам на callback завершиться
+            await asyncio.sleep(0)
+            return result
+
+        return self.loop.run_until_complete(scenario()), query
+
+    def test_longest_prefix_wins(self):
+        """
+        Более длинный префикс выбирается раньше короткого
+        """
+        for name in (
+            "edit_instrument_sl",
+            "edit_instrument_sl_activation",
+            "edit_level_menu",
+            "edit_level_start",
+        ):
+            self._record(name)
+
+        self._press("edit_inst_sl_activation_SBER")
+        self._press("edit_inst_sl_SBER")
+        self._press("edit_level_menu_SBER")
+        self._press("edit_level_2_SBER")
+
+        self.assertEqual(self.calls, [
+            ("edit_instrument_sl_activation", ("SBER",), {}),
+            ("edit_instrument_sl", ("SBER",), {}),
+            ("edit_level_menu", (), {}),
+            ("edit_level_start", (2,), {}),
+        ])
+
+    def test_fixed_and_multi_tp_routes(self):
+        """
+        Кнопки без параметра и кнопки Multi-TP инструмента
+        """
+        self._record("show_multi_tp_menu")
+        self._record("toggle_multi_tp")
+
+        self._press("global_multi_tp")
+        self._press("inst_multi_tp_SBER")
+        self._press("toggle_inst_multi_tp_SBER")
+
+        self.assertEqual(self.calls, [
+            ("show_multi_tp_menu", (), {"is_global": True}),
+            ("show_multi_tp_menu", (), {"is_global": False, "ticker": "SBER"}),
+            ("toggle_multi_tp", (), {"is_global": False, "ticker": "SBER"}),
+        ])
+
+    def test_unknown_callback_is_answered(self):
+        """
+        Неизвестная кнопка возвращает в главное меню и подтверждается
+        """
+        result, query = self._press("unknown")
+
+        self.assertEqual(result, MAIN_MENU)
+        self.assertEqual(query.answers, [(None, False)])
+
+    def test_handler_answer_is_not_repeated(self):
+        """
+        Callback, подтвержденный обработчиком, не подтверждается повторно
+        """
+        _, query = self._press("instrument_SBER")
+
+        self.assertEqual(query.answers, [(None, False)])
+
+    def test_alert_is_the_only_answer(self):
+        """
+        Уведомление после сброса и удаления - единственный ответ на callback,
+        хотя затем показывается другое меню
+        """
+        _, reset_query = self._press("reset_inst_SBER")
+        _, delete_query = self._press("delete_inst_SBER")
+
+        self.assertEqual(reset_query.answers, [("✅ Настройки сброшены на глобальные", True)])
+        self.assertEqual(delete_query.answers, [("✅ Инструмент SBER удален", True)])
+
+
+class MockMessage:
+    """
+    Мок для Message с текстом пользователя: запоминает ответы
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class TestAddInstrument(unittest.TestCase):
+    """
+    Тесты для SettingsMenu.add_instrument_save
+    """
+
+    def setUp(self):
+        """
+        Создание меню с моками
+        """
+        self.loop = asyncio.new_event_loop()
+        self.settings_manager = MockSettingsManager()
+        self.menu = SettingsMenu(self.settings_manager, MockDatabase(), "1")
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _save(self, text: str):
+        message = MockMessage(text)
+        update = SimpleNamespace(message=message)
+        context = SimpleNamespace(user_data={})
+        result = self.loop.run_until_complete(self.menu.add_instrument_save(update, context))
+        return result, message
+
+    def test_valid_ticker_is_saved(self):
+        """
+        Тикер приводится к верхнему регистру и сохраняется
+        """
+        result, _ = self._save(" sber ")
+
+        self.assertEqual(result, MAIN_MENU)
+        self.assertEqual(self.settings_manager.created, ["SBER"])
+
+    def test_invalid_ticker_is_rejected(self):
+        """
+        Тикер с недопустимыми символами не сохраняется, ввод запрашивается снова
+        """
+        for text in ("<b>SBER</b>", "SBER&GAZP", "СБЕР", "ABCDEFGHIJKLM", ""):
+            result, message = self._save(text)
+
+            self.assertEqual(result, ADD_INSTRUMENT)
+            self.assertTrue(message.replies[0].startswith("❌ Неверный тикер"))
+
+        self.assertEqual(self.settings_manager.created, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,284 @@
+import unittest
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.bot.bot import (
+    TelegramBot,
+    MAX_MESSAGE_LENGTH,
+    MESSAGE_SEPARATOR,
+    DROPPED_MESSAGES_NOTICE,
+    ACTIVE_ACCOUNT_CACHE_TTL,
+)
+
+
+class MockDatabase:
+    """
+    Мок для Database: считает запросы активного аккаунта
+    """
+
+    def __init__(self):
+        self.account = SimpleNamespace(name="main")
+        self.calls = 0
+
+    async def get_active_account(self):
+        self.calls += 1
+        return self.account
+
+
+class TestTelegramBotBatching(unittest.TestCase):
+    """
+    Тесты для пакетной отправки сообщений TelegramBot
+    """
+
+    def setUp(self):
+        """
+        Создание бота без подключения к Telegram
+        """
+        self.loop = asyncio.new_event_loop()
+        self.bot = TelegramBot(
+            token="token",
+            chat_id="1",
+            database=None,
+            position_manager=None
+        )
+        self.sent = []
+
+        async def send_now(text: str):
+            self.sent.append(text)
+
+        self.bot._send_now = send_now
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def test_pack_merges_short_messages(self):
+        """
+        Короткие сообщения объединяются в одно
+        """
+        packed = TelegramBot._pack_messages(["a", "b", "c"])
+
+        self.assertEqual(packed, [(MESSAGE_SEPARATOR.join(["a", "b", "c"]), 3)])
+
+    def test_pack_splits_at_limit(self):
+        """
+        Пакет не превышает MAX_MESSAGE_LENGTH, порядок сообщений сохраняется
+        """
+        half = "x" * (MAX_MESSAGE_LENGTH // 2)
+        texts = [half, half, "tail"]
+
+        packed = TelegramBot._pack_messages(texts)
+
+        self.assertEqual([count for _, count in packed], [1, 2])
+        self.assertEqual(packed[0][0], half)
+        self.assertEqual(packed[1][0], MESSAGE_SEPARATOR.join([half, "tail"]))
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text, _ in packed))
+
+    def test_pack_keeps_exact_limit_in_one_message(self):
+        """
+        Сообщения, вместе с разделителем занимающие ровно лимит, не разделяются
+        """
+        first = "x" * (MAX_MESSAGE_LENGTH - len(MESSAGE_SEPARATOR) - 1)
+
+        packed = TelegramBot._pack_messages([first, "y"])
+
+        self.assertEqual(len(packed), 1)
+        self.assertEqual(len(packed[0][0]), MAX_MESSAGE_LENGTH)
+
+    def test_flush_sends_queued_messages_as_one(self):
+        """
+        Сообщения из очереди отправляются одним пакетом, очередь пустеет
+        """
+        async def scenario():
+            for text in ("first", "second"):
+                await self.bot.send_message(text)
+            await self.bot._flush_batch()
+
+        self.loop.run_until_complete(scenario())
+
+        self.assertEqual(self.sent, [MESSAGE_SEPARATOR.join(["first", "second"])])
+        self.assertTrue(self.bot._outbox.empty())
+        self.assertEqual(self.bot._batch, [])
+
+    def test_dropped_messages_notice(self):
+        """
+        При переполнении очереди старое сообщение отбрасывается,
+        а следующий пакет начинается с пометки о пропуске
+        """
+        async def scenario():
+            self.bot._outbox = asyncio.Queue(maxsize=2)
+            for text in ("first", "second", "third"):
+                await self.bot.send_message(text)
+            await self.bot._flush_batch()
+
+        self.loop.run_until_complete(scenario())
+
+        notice = DROPPED_MESSAGES_NOTICE.format(count=1)
+        self.assertEqual(self.sent, [MESSAGE_SEPARATOR.join([notice, "second", "third"])])
+        self.assertEqual(self.bot._dropped_messages, 0)
+        self.assertEqual(self.bot._batch, [])
+
+    def test_cancelled_flush_keeps_unsent_messages(self):
+        """
+        Отмена отправки не теряет сообщения: они остаются в пакете
+        и отправляются следующим вызовом _flush_batch
+        """
+        long_text = "x" * (MAX_MESSAGE_LENGTH - 10)
+
+        async def scenario():
+            started = asyncio.Event()
+
+            async def blocking_send(text: str):
+                started.set()
+                await asyncio.sleep(10)
+
+            self.bot._send_now = blocking_send
+            self.bot._batch = ["a" + long_text, "b" + long_text]
+
+            task = asyncio.create_task(self.bot._flush_batch())
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            remaining = list(self.bot._batch)
+
+            async def send_now(text: str):
+                self.sent.append(text)
+
+            self.bot._send_now = send_now
+            await self.bot._flush_batch()
+            return remaining
+
+        remaining = self.loop.run_until_complete(scenario())
+
+        self.assertEqual(len(remaining), 2)
+        self.assertEqual([text[0] for text in self.sent], ["a", "b"])
+        self.assertEqual(self.bot._batch, [])
+
+    @patch("src.bot.bot.FLUSH_INTERVAL", 0)
+    def test_flush_loop_survives_errors(self):
+        """
+        Ошибка при отправке пакета не останавливает фоновую задачу:
+        пакет отбрасывается, следующие сообщения отправляются
+        """
+        async def scenario():
+            async def failing_send(text: str):
+                self.bot._send_now = send_now
+                raise RuntimeError("boom")
+
+            async def send_now(text: str):
+                self.sent.append(text)
+
+            self.bot._send_now = failing_send
+            task = asyncio.create_task(self.bot._flush_outbox())
+
+            await self.bot.send_message("lost")
+            for _ in range(5):
+                await asyncio.sleep(0)
+            await self.bot.send_message("delivered")
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+            alive = not task.done()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return alive
+
+        alive = self.loop.run_until_complete(scenario())
+
+        self.assertTrue(alive)
+        self.assertEqual(self.sent, ["delivered"])
+        self.assertEqual(self.bot._batch, [])
+
+    def test_send_message_now_skips_queue(self):
+        """
+        Ответ на команду отправляется сразу, минуя очередь
+        """
+        self.loop.run_until_complete(self.bot.send_message_now("reply"))
+
+        self.assertEqual(self.sent, ["reply"])
+        self.assertTrue(self.bot._outbox.empty())
+
+
+class TestTelegramBotActiveAccount(unittest.TestCase):
+    """
+    Тесты для кэша активного аккаунта TelegramBot
+    """
+
+    def setUp(self):
+        """
+        Создание бота с моком базы данных
+        """
+        self.loop = asyncio.new_event_loop()
+        self.db = MockDatabase()
+        self.bot = TelegramBot(
+            token="token",
+            chat_id="1",
+            database=self.db,
+            position_manager=None
+        )
+
+    def tearDown(self):
+        """
+        Закрытие цикла событий теста
+        """
+        self.loop.close()
+
+    def _get_at(self, now: float):
+        """
+        Получение активного аккаунта в момент времени now
+        """
+        with patch("src.bot.bot.time.monotonic", return_value=now):
+            return self.loop.run_until_complete(self.bot.get_active_account())
+
+    def test_cached_within_ttl(self):
+        """
+        В пределах TTL аккаунт берется из кэша
+        """
+        first = self._get_at(100.0)
+        second = self._get_at(100.0 + ACTIVE_ACCOUNT_CACHE_TTL / 2)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.db.calls, 1)
+
+    def test_expires_after_ttl(self):
+        """
+        После истечения TTL аккаунт запрашивается заново
+        """
+        self._get_at(100.0)
+        self.db.account = SimpleNamespace(name="spare")
+
+        account = self._get_at(100.0 + ACTIVE_ACCOUNT_CACHE_TTL)
+
+        self.assertEqual(account.name, "spare")
+        self.assertEqual(self.db.calls, 2)
+
+    def test_none_is_cached(self):
+        """
+        Отсутствие активного аккаунта тоже кэшируется
+        """
+        self.db.account = None
+
+        self._get_at(100.0)
+        self._get_at(101.0)
+
+        self.assertEqual(self.db.calls, 1)
+
+    def test_invalidate(self):
+        """
+        Сброс кэша приводит к повторному запросу
+        """
+        self._get_at(100.0)
+        self.bot.invalidate_active_account()
+        self._get_at(100.0)
+
+        self.assertEqual(self.db.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()